@@ -0,0 +1,159 @@
+###############################################################################################################
+#
+#
+# End-to-end benchmark: runs main() (upload) and export_glossary_to_csv against mock_confluence.py at a
+# few glossary sizes and reports, per run:
+# - wall time
+# - requests the mock server received (from its /__stats endpoint)
+# - peak Python memory of this process (tracemalloc)
+# The mock runs in its own process, so its page store doesn't count towards the memory figures, and a
+# fresh mock is started for every run. tracemalloc slows Python down several times over, so each size is
+# run twice: once untraced for the wall time and request count, once traced for peak memory
+# (--skip-memory leaves the second run out). The scripts' own output is discarded.
+#
+# The client's rate limit is off by default (--rate 0) so the numbers show the scripts' own cost;
+# pass --rate 50 to benchmark with the production throttle. --latency, --throttle-rate and
+# --error-rate are handed to the mock to see how the scripts cope with a slow or overloaded server.
+#
+# To run: python benchmark_end_to_end.py [--sizes 100,1000,10000] [--latency 0.01] [--json results.json]
+#
+#
+###############################################################################################################
+
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+from bulkTerms_Confluence import category_mapping, export_glossary_to_csv, main
+
+MOCK_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_confluence.py")
+
+
+@contextlib.contextmanager
+def mock_server(args):
+    command = [sys.executable, MOCK_SCRIPT, "--port", "0", "--latency", str(args.latency),
+               "--max-limit", str(args.max_limit), "--throttle-rate", str(args.throttle_rate),
+               "--error-rate", str(args.error_rate), "--seed", "1"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        # First line: "Mock Confluence listening on http://127.0.0.1:PORT"
+        base_url = process.stdout.readline().strip().rsplit(" ", 1)[-1]
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def write_terms_csv(path, terms):
+    categories = list(category_mapping)
+    with open(path, mode='w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=["Term", "Definition", "Category"])
+        writer.writeheader()
+        for i in range(terms):
+            writer.writerow({
+                "Term": f"Benchmark Term {i:05d}",
+                "Definition": f"Definition of benchmark term {i}.\nSecond line with <markup> & entities.",
+                "Category": categories[i % len(categories)]
+            })
+
+
+def request_count(base_url):
+    stats = requests.get(f"{base_url}/__stats", timeout=10).json()
+    requests.post(f"{base_url}/__reset", timeout=10)
+    return stats["requests"]
+
+
+# Runs func with its prints discarded, returning (wall seconds, peak MiB or None)
+def measure(func, *args, trace_memory=False, **kwargs):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, mode='w') as devnull, contextlib.redirect_stdout(devnull):
+            func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+# Uploads `terms` generated terms to a fresh mock, then exports them again
+def upload_then_export(terms, args, workdir, trace_memory):
+    csv_path = os.path.join(workdir, f"upload_{terms}.csv")
+    export_path = os.path.join(workdir, f"export_{terms}.csv")
+    write_terms_csv(csv_path, terms)
+    results = []
+
+    with mock_server(args) as base_url:
+        request_count(base_url)
+
+        elapsed, peak = measure(main, False, None, "mock-token", csv_path, trace_memory=trace_memory,
+                                base_url=base_url, max_in_flight=args.workers,
+                                max_requests_per_second=args.rate or None)
+        results.append({"operation": "upload", "terms": terms, "seconds": elapsed,
+                        "requests": request_count(base_url), "peak_mib": peak})
+
+        elapsed, peak = measure(export_glossary_to_csv, False, None, "mock-token", export_path,
+                                trace_memory=trace_memory, max_workers=args.workers, page_size=args.page_size,
+                                base_url=base_url, max_requests_per_second=args.rate or None)
+        with open(export_path, mode='r', encoding='utf-8') as exported:
+            exported_terms = sum(1 for _ in csv.DictReader(exported))
+        results.append({"operation": "export", "terms": exported_terms, "seconds": elapsed,
+                        "requests": request_count(base_url), "peak_mib": peak})
+
+    return results
+
+
+def run_size(terms, args, workdir):
+    results = upload_then_export(terms, args, workdir, trace_memory=False)
+    if not args.skip_memory:
+        for result, traced in zip(results, upload_then_export(terms, args, workdir, trace_memory=True)):
+            result["peak_mib"] = traced["peak_mib"]
+    return results
+
+
+def print_table(results):
+    print(f"{'operation':<10}{'terms':>8}{'seconds':>10}{'terms/s':>10}{'requests':>10}{'peak MiB':>10}")
+    for result in results:
+        rate = result["terms"] / result["seconds"] if result["seconds"] else 0
+        peak = f"{result['peak_mib']:.1f}" if result["peak_mib"] is not None else "-"
+        print(f"{result['operation']:<10}{result['terms']:>8}{result['seconds']:>10.2f}{rate:>10.0f}"
+              f"{result['requests']:>10}{peak:>10}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark upload and export against a local mock Confluence.")
+    arg_parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated glossary sizes")
+    arg_parser.add_argument("--workers", type=int, default=8, help="max_in_flight / max_workers")
+    arg_parser.add_argument("--page-size", type=int, default=200)
+    arg_parser.add_argument("--rate", type=float, default=0, help="client requests per second, 0 for unlimited")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="mock latency per response, in seconds")
+    arg_parser.add_argument("--max-limit", type=int, default=200, help="mock page-size cap")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of mock responses that are 429")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock responses that are 503")
+    arg_parser.add_argument("--skip-memory", action="store_true", help="skip the tracemalloc run for peak memory")
+    arg_parser.add_argument("--json", help="also write the results to this JSON file")
+    args = arg_parser.parse_args()
+
+    all_results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(size) for size in args.sizes.split(",")):
+            print(f"Running {size} terms...", flush=True)
+            all_results += run_size(size, args, workdir)
+
+    print_table(all_results)
+    if args.json:
+        with open(args.json, mode='w', encoding='utf-8') as json_file:
+            json.dump(all_results, json_file, indent=2)
@@ -0,0 +1,166 @@
+###############################################################################################################
+#
+#
+# Micro-benchmark for extract_definition_from_html: the old five-pass regex chain ("before") against the
+# single-pass tag walker that replaced it ("after"), in pages per second.
+#
+# The corpus is a seeded set of synthetic storage-format bodies shaped like our glossary pages:
+# - pages created by the uploader (escaped text with <br /> inside the definition cell)
+# - pages edited in Confluence (one <p> per paragraph, inline formatting, links)
+# - long pages with a lot of content after the definition table
+# - pages without a definition table
+# Real bodies can be added with --corpus: a folder of files, each holding one page's body.storage value
+# (for example saved with get_page_content from bulkTerms_Confluence.py).
+#
+# Both versions must agree on every page that the old regex handled correctly; any mismatch is listed.
+#
+# To run: python benchmark_extract_definition.py [--pages 2000] [--repeat 5] [--corpus path\to\bodies]
+#
+#
+###############################################################################################################
+
+
+import argparse
+import html
+import os
+import random
+import re
+import time
+
+from bulkTerms_Confluence import extract_definition_from_html, html_format_multiline
+
+WORDS = ("assessment parcel roll value exemption levy district owner appraisal market land improvement "
+         "tax rate certified notice appeal & < > \"quoted\" year-end").split()
+
+
+# The regex implementation extract_definition_from_html replaced, kept here as the "before" baseline
+def legacy_extract_definition_from_html(html_content):
+    match = re.search(r"<table.*?>(.*?)</table>", html_content, re.DOTALL | re.IGNORECASE)
+    if not match:
+        return ""
+    table_html = match.group(1)
+
+    td_match = re.search(r"<td.*?>(.*?)</td>", table_html, re.DOTALL | re.IGNORECASE)
+    if not td_match:
+        return ""
+
+    td_html = td_match.group(1)
+
+    paragraphs = re.findall(r"<p.*?>(.*?)</p>", td_html, re.DOTALL | re.IGNORECASE)
+
+    if not paragraphs:
+        text = re.sub(r"<.*?>", "", td_html)
+        return html.unescape(text).strip()
+
+    clean_paragraphs = []
+    for p in paragraphs:
+        p_text = re.sub(r"<.*?>", "", p)
+        p_text = html.unescape(p_text).strip()
+        clean_paragraphs.append(p_text)
+
+    definition = "\n".join(clean_paragraphs)
+
+    definition = re.sub(r"[ \t]+", " ", definition)
+    definition = re.sub(r"\n\s*\n", "\n", definition)
+
+    return definition.strip()
+
+
+def sentence(rng, low=5, high=30):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+# Same template main() uploads
+def uploaded_page(rng):
+    text = "\n".join(sentence(rng) for _ in range(rng.randint(1, 4)))
+    return f"""
+            <ac:structured-macro ac:name="details">
+              <ac:rich-text-body>
+                <table>
+                  <tr><th>Definition</th></tr>
+                  <tr><td>{html_format_multiline(text)}</td></tr>
+                </table>
+              </ac:rich-text-body>
+            </ac:structured-macro>
+            """
+
+
+def edited_page(rng):
+    paragraphs = []
+    for _ in range(rng.randint(1, 6)):
+        words = html.escape(sentence(rng))
+        if rng.random() < 0.3:
+            words = f"<strong>{words}</strong> {html.escape(sentence(rng, 2, 6))}"
+        if rng.random() < 0.2:
+            words += ' <a href="https://example.com/page">see also</a>'
+        paragraphs.append(f'<p class="auto-cursor-target">{words}</p>')
+    cell = "\n  ".join(paragraphs)
+    return (f'<ac:structured-macro ac:name="details" ac:schema-version="1" ac:macro-id="{rng.randint(1, 10**9)}">'
+            f'<ac:rich-text-body><table class="wrapped"><colgroup><col /></colgroup><tbody>'
+            f'<tr><th><p>Definition</p></th></tr><tr><td>\n  {cell}\n</td></tr>'
+            f'</tbody></table></ac:rich-text-body></ac:structured-macro>')
+
+
+def long_page(rng):
+    trailing = "".join(
+        f"<h2>{html.escape(sentence(rng, 2, 5))}</h2><p>{html.escape(sentence(rng, 50, 120))}</p>"
+        f"<table><tr><td><p>{html.escape(sentence(rng))}</p></td></tr></table>"
+        for _ in range(rng.randint(20, 60))
+    )
+    return edited_page(rng) + trailing
+
+
+def no_table_page(rng):
+    return "".join(f"<p>{html.escape(sentence(rng, 20, 80))}</p>" for _ in range(rng.randint(3, 30)))
+
+
+def synthetic_corpus(pages, seed=7):
+    rng = random.Random(seed)
+    builders = [uploaded_page] * 4 + [edited_page] * 4 + [long_page, no_table_page]
+    return [rng.choice(builders)(rng) for _ in range(pages)]
+
+
+def load_corpus(folder):
+    bodies = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            with open(path, mode='r', encoding='utf-8') as body_file:
+                bodies.append(body_file.read())
+    return bodies
+
+
+def pages_per_second(extract, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in corpus:
+            extract(body)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(corpus) / best
+
+
+def run(corpus, repeat, label):
+    mismatches = [i for i, body in enumerate(corpus)
+                  if legacy_extract_definition_from_html(body) != extract_definition_from_html(body)]
+
+    before = pages_per_second(legacy_extract_definition_from_html, corpus, repeat)
+    after = pages_per_second(extract_definition_from_html, corpus, repeat)
+
+    print(f"{label}: {len(corpus)} pages, {sum(len(body) for body in corpus) / 1024:.0f} KiB")
+    print(f"  before (regex chain):   {before:10.0f} pages/s")
+    print(f"  after  (single pass):   {after:10.0f} pages/s   ({after / before:.2f}x)")
+    print(f"  differing outputs: {len(mismatches)}" + (f" (pages {mismatches[:10]})" if mismatches else ""))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark extract_definition_from_html.")
+    arg_parser.add_argument("--pages", type=int, default=2000, help="number of synthetic pages")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="timing runs; the best one is reported")
+    arg_parser.add_argument("--corpus", help="folder of saved body.storage values to benchmark as well")
+    args = arg_parser.parse_args()
+
+    run(synthetic_corpus(args.pages), args.repeat, "synthetic")
+    if args.corpus:
+        run(load_corpus(args.corpus), args.repeat, f"corpus '{args.corpus}'")
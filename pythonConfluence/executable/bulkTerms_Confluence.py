@@ -9,6 +9,8 @@
 # (Example: cd C:\Users\Your.Name\OneDrive - Tyler Technologies, Inc\Desktop\Confluence\bulkTerms_Confluence\bulkTerms_Confluence)
 # From here, run: pyinstaller --onefile --windowed --add-data "bulkTerms_Confluence.py;." ui.py
 #
+# For scheduled or headless runs, use glossary_cli.py (verify / upload / export) instead of the UI.
+#
 #
 # Helpful hints: 
 # Comment out selected lines --> Ctrl + K [release] Ctrl + C 
@@ -18,85 +20,435 @@
 ###############################################################################################################
 
 
-import csv
+import asyncio
+import hashlib
 import html
-import requests
 import re
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlparse
+import requests
+from confluence_client import ConfluenceClient
+from export_sinks import SINKS, open_sink
+from glossary_index import GlossaryIndex
+from upload_journal import FINISHED_STATES, UploadJournal
+from upload_preflight import PreflightError, validate_upload_csv
 
 space_key = "iassupport"
 
+# Label every uploaded term carries; the label-search export finds terms by it
+glossary_label = "glossary-terms"
+
+# Every uploaded page gets these labels, plus its category's own labels from category_mapping
+glossary_labels = [glossary_label]
+
 # Mapping categories to labels and parent page IDs
 category_mapping = {
-    "enterprise assessment": { "parent_title": "Enterprise Assessment" },
-    "enterprise property tax": { "parent_title": "Enterprise Property Tax" },
-    "enterprise tools": { "parent_title": "Enterprise Tools" },
-    "common rolltypes": { "parent_title": "Common Rolltypes" },
-    "general terms": { "parent_title": "General Terms" }
+    "enterprise assessment": { "parent_title": "Enterprise Assessment", "labels": ["enterprise-assessment"] },
+    "enterprise property tax": { "parent_title": "Enterprise Property Tax", "labels": ["enterprise-property-tax"] },
+    "enterprise tools": { "parent_title": "Enterprise Tools", "labels": ["enterprise-tools"] },
+    "common rolltypes": { "parent_title": "Common Rolltypes", "labels": ["common-rolltypes"] },
+    "general terms": { "parent_title": "General Terms", "labels": ["general-terms"] }
 }
 
-# Helper function to preserve multiline formatting
+# Helper function to preserve multiline formatting: one <p> per line, which the export reads back as
+# one line each (a <br /> inside a paragraph would be lost)
 def html_format_multiline(text):
-    escaped = html.escape(text)
-    return escaped.replace('\n', '<br />')
+    return "".join(f"<p>{html.escape(line)}</p>" for line in text.split('\n'))
 
 # Helper function to dynamically fetch the page ids by title
-def get_pageid_by_title(title, space_key, base_url, headers, auth, cloud):
-    url = f"{base_url}/rest/api/content"
+def get_pageid_by_title(title, space_key, client):
     params = {
         "title": title,
         "spaceKey": space_key,
         "expand": "version"
     }
-    response = requests.get(url, headers=headers, params=params, **({"auth": auth} if cloud else {}))
+    response = client.get("/rest/api/content", params=params)
     if response.status_code == 200:
         results = response.json().get("results")
         if results:
             return results[0]["id"]
-    print(f"Could not find page ID for title '{title}' in space '{space_key}'")
+    client.log(f"Could not find page ID for title '{title}' in space '{space_key}'")
     return None
 
-def main(cloud, email, api_token, csv_file_path):
-    if cloud:
-        auth = (email, api_token)
-        base_url = "https://tylertech.atlassian.net/wiki"
-        headers = { "Content-Type": "application/json" }
+
+# Small JSON caches kept between runs (parent page IDs, exported page bodies)
+def load_json_cache(cache_path):
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, mode='r', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache '{cache_path}': {e}")
+        return {}
+
+def save_json_cache(cache_path, cache):
+    if not cache_path:
+        return
+    # Write to a temp file first so an interrupted run never leaves a truncated cache behind
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, mode='w', encoding='utf-8') as cache_file:
+        json.dump(cache, cache_file, indent=2)
+    os.replace(tmp_path, cache_path)
+
+# Resolves every category's parent page ID once per run, concurrently, instead of once per CSV row.
+# The optional cache is keyed by base URL, space key and title; entries younger than cache_ttl seconds
+# are used without a request.
+def resolve_parent_page_ids(client, cache_path=None, cache_ttl=24 * 60 * 60):
+    cache = load_json_cache(cache_path)
+    now = time.time()
+    parent_ids = {}
+    to_lookup = []
+
+    for category, mapping in category_mapping.items():
+        cached = cache.get(f"{client.base_url}|{space_key}|{mapping['parent_title']}")
+        if cached and now - cached["resolved_at"] < cache_ttl:
+            parent_ids[category] = cached["id"]
+        else:
+            to_lookup.append(category)
+
+    if to_lookup:
+        def lookup(category):
+            parent_title = category_mapping[category]["parent_title"]
+            return get_pageid_by_title(parent_title, space_key, client)
+
+        with ThreadPoolExecutor(max_workers=len(to_lookup)) as executor:
+            for category, page_id in zip(to_lookup, executor.map(lookup, to_lookup)):
+                parent_ids[category] = page_id
+                if page_id:
+                    cache[f"{client.base_url}|{space_key}|{category_mapping[category]['parent_title']}"] = {
+                        "id": page_id,
+                        "resolved_at": now
+                    }
+        save_json_cache(cache_path, cache)
+
+    return parent_ids
+
+# Page IDs of the sub-pages named by exported category paths ("Enterprise Tools > Assessment Terms"), keyed
+# by (category, sub-page titles). Titles are unique per space, so the last title is looked up directly and
+# the page's ancestors must then lead back through the rest of the path to the category's parent page.
+# Paths that don't resolve map to None.
+def resolve_subcategory_page_ids(client, preflight, parent_ids):
+    paths = {(entry["category"], entry["subcategory"]) for entry in preflight.valid_rows if entry["subcategory"]}
+    if not paths:
+        return {}
+
+    def lookup(path):
+        category, subcategory = path
+        params = {"title": subcategory[-1], "spaceKey": space_key, "expand": "ancestors"}
+        response = client.get("/rest/api/content", params=params)
+        if response.status_code != 200:
+            return None
+        for page in response.json().get("results") or []:
+            ancestors = (page.get("ancestors") or [])[-len(subcategory):]
+            ancestor_keys = [title_key(ancestor["title"]) for ancestor in ancestors[1:]]
+            if (len(ancestors) == len(subcategory) and ancestors[0]["id"] == parent_ids.get(category)
+                    and ancestor_keys == [title_key(title) for title in subcategory[:-1]]):
+                return page["id"]
+        return None
+
+    paths = sorted(paths)
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+        return dict(zip(paths, executor.map(lookup, paths)))
+
+def main(cloud, email, api_token, csv_file_path, parent_id_cache=None, parent_id_cache_ttl=24 * 60 * 60,
+         max_in_flight=8, check_existing=True, upsert=False, journal=True, journal_path=None, resume=False,
+         base_url=None, max_requests_per_second=50, metrics_path=None, on_event=None, cancel_event=None,
+         allow_invalid_rows=False):
+    with ConfluenceClient(cloud, email, api_token, base_url=base_url, pool_size=max_in_flight,
+                          max_requests_per_second=max_requests_per_second, log=partial(report, on_event)) as client:
+        try:
+            return upload_terms(client, csv_file_path, parent_id_cache=parent_id_cache,
+                                parent_id_cache_ttl=parent_id_cache_ttl, max_in_flight=max_in_flight,
+                                check_existing=check_existing, upsert=upsert, journal=journal,
+                                journal_path=journal_path, resume=resume, on_event=on_event,
+                                cancel_event=cancel_event, allow_invalid_rows=allow_invalid_rows)
+        finally:
+            report_metrics(client, metrics_path, operation="upload", csv_file_path=csv_file_path)
+
+class OperationCancelled(Exception):
+    pass
+
+# A page or listing that couldn't be read, even after the client's retries. Exports stop on it rather than
+# write, cache or index an incomplete glossary.
+class ConfluenceReadError(Exception):
+    pass
+
+# Progress reporting for callers such as ui.py: on_event, when given, is called with one dict per event
+# ({"type": "log" | "start" | "progress" | "finished", ...}), possibly from a worker thread.
+def emit(on_event, event_type, **fields):
+    if on_event is not None:
+        on_event(dict(fields, type=event_type))
+
+# print() for the console, plus a "log" event
+def report(on_event, message):
+    print(message)
+    emit(on_event, "log", message=message)
+
+def cancelled(cancel_event):
+    return cancel_event is not None and cancel_event.is_set()
+
+# Prints the per-endpoint request summary and, when metrics_path is set, saves it as JSON.
+# Runs whether or not the upload/export finished, since a failed run's numbers are the interesting ones.
+def report_metrics(client, metrics_path=None, **run):
+    client.metrics.print_summary()
+    if metrics_path:
+        try:
+            client.metrics.save(metrics_path, base_url=client.base_url, **run)
+        except OSError as e:
+            print(f"Could not write metrics to '{metrics_path}': {e}")
+
+def upload_terms(client, csv_file_path, parent_id_cache=None, parent_id_cache_ttl=24 * 60 * 60, max_in_flight=8,
+                 check_existing=True, upsert=False, journal=True, journal_path=None, resume=False, on_event=None,
+                 cancel_event=None, allow_invalid_rows=False):
+    return asyncio.run(
+        upload_terms_async(client, csv_file_path, parent_id_cache=parent_id_cache,
+                           parent_id_cache_ttl=parent_id_cache_ttl, max_in_flight=max_in_flight,
+                           check_existing=check_existing, upsert=upsert, journal=journal,
+                           journal_path=journal_path, resume=resume, on_event=on_event,
+                           cancel_event=cancel_event, allow_invalid_rows=allow_invalid_rows)
+    )
+
+# Where a CSV's upload journal lives unless journal_path says otherwise
+def default_journal_path(csv_file_path):
+    return f"{csv_file_path}.journal.db"
+
+# upsert=True also updates terms that already exist in a glossary category, but only when the normalized
+# definition differs from the page's (or the term moved category); unchanged terms cost no request.
+# Each row's progress is checkpointed to a SQLite journal (see upload_journal.py); resume=True reruns an
+# interrupted upload of the same CSV, skipping finished rows and only labeling pages created without labels.
+# Setting cancel_event stops the upload after the rows already in progress; the rest are "cancelled"
+# and stay pending in the journal.
+# The whole CSV is checked first (see upload_preflight.py) and every problem reported at once; if there are
+# errors, PreflightError is raised before any request, unless allow_invalid_rows uploads the valid rows only.
+# Exact duplicate rows are always dropped.
+async def upload_terms_async(client, csv_file_path, parent_id_cache=None, parent_id_cache_ttl=24 * 60 * 60,
+                             max_in_flight=8, check_existing=True, upsert=False, journal=True, journal_path=None,
+                             resume=False, on_event=None, cancel_event=None, allow_invalid_rows=False):
+    preflight = validate_upload_csv(csv_file_path, category_mapping)
+    for line in preflight.lines():
+        report(on_event, line)
+    if not preflight.ok and not allow_invalid_rows:
+        raise PreflightError(preflight)
+
+    # Look up the category parent pages once, up front
+    parent_ids = await asyncio.to_thread(resolve_parent_page_ids, client, parent_id_cache, parent_id_cache_ttl)
+
+    subcategory_ids = await asyncio.to_thread(resolve_subcategory_page_ids, client, preflight, parent_ids)
+
+    rows = read_upload_rows(preflight, parent_ids, subcategory_ids)
+
+    upload_journal = None
+    if journal or resume:
+        journal_path = journal_path or default_journal_path(csv_file_path)
+        upload_journal = UploadJournal(journal_path, csv_file_path, resume=resume)
+    try:
+        if resume:
+            apply_journal_states(rows, upload_journal.load_states())
+
+        # One scan of the space's titles replaces a failed POST per term that already exists;
+        # upserts also need each page's current definition hash and version from that scan
+        if check_existing or upsert:
+            title_index = await asyncio.to_thread(build_title_index, client, 200, upsert, on_event)
+            classify_existing_rows(rows, title_index, upsert, set(parent_ids.values()))
+
+        if upload_journal is not None:
+            for row in rows:
+                upload_journal.record_row(row)
+            upload_journal.flush()
+
+        # Rows settled without a request report their messages now; the rest as they finish
+        work = [row for row in rows if row["status"] in UPLOAD_WORK_STATUSES]
+        for row in rows:
+            if row["status"] not in UPLOAD_WORK_STATUSES:
+                for message in row["messages"]:
+                    emit(on_event, "log", message=message)
+        emit(on_event, "start", operation="upload", total=len(work))
+
+        await upload_rows_async(client, rows, max_in_flight, upload_journal, on_event, cancel_event)
+    finally:
+        if upload_journal is not None:
+            upload_journal.close()
+
+    # Report every row in CSV order, however the uploads interleaved
+    for row in rows:
+        for message in row["messages"]:
+            print(message)
+
+    counts = count_upload_statuses(rows)
+    if resume:
+        report(on_event, f"Resumed from journal: {counts['resumed']} rows were already finished in an earlier run.")
+    if counts["cancelled"]:
+        report(on_event, f"Upload cancelled: {counts['cancelled']} rows were not uploaded.")
+    if upsert:
+        report(on_event, f"Upload complete. {counts['created']} created ({counts['unlabeled']} without labels), "
+                         f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['collided']} collided, "
+                         f"{counts['failed']} failed, {counts['skipped']} skipped.")
     else:
-        base_url = "https://confl.tylertech.com"
-        auth = None
-        headers = {
-            "Authorization": f"Bearer {api_token}",
-            "Content-Type": "application/json"
-        }
+        report(on_event, f"Upload complete. {counts['created']} created ({counts['unlabeled']} without labels), "
+                         f"{counts['existing']} already existed, {counts['collided']} collided, "
+                         f"{counts['failed']} failed, {counts['skipped']} skipped.")
+    emit(on_event, "finished", operation="upload", counts=counts)
+    return rows
 
-    # Read CSV
-    with open(csv_file_path, mode='r', encoding='utf-8-sig') as csvfile:
-        reader = csv.DictReader(csvfile)
+# Row statuses that still need requests when the upload starts
+UPLOAD_WORK_STATUSES = ("pending", "update", "label_pending")
 
-        # Get the term, definition, and location for each term in the CSV
-        for row in reader:
-            term = html.escape(row.get("Term", "").strip())
-            definition = html_format_multiline(row.get("Definition", "").strip())
-            category = html.escape(row.get("Category", "").strip().lower())
+# Totals by outcome for the summary line and the "finished" event
+def count_upload_statuses(rows):
+    def count(*statuses):
+        return sum(1 for row in rows if row["status"] in statuses)
 
-            if not term or not definition or not category:
-                print(f"Skipping incomplete row: {row}")
-                continue
+    return {
+        "created": count("created", "labeled", "label_failed"),
+        "unlabeled": count("label_failed"),
+        "updated": count("updated"),
+        "unchanged": count("unchanged"),
+        "existing": count("exists"),
+        "collided": count("collision"),
+        "failed": count("failed"),
+        "skipped": count("skipped"),
+        "resumed": count("resumed"),
+        "cancelled": count("cancelled")
+    }
 
-            # Get label and parent page ID from category mapping
-            mapping = category_mapping.get(category)
-            if not mapping:
-                print(f"Warning: Category '{category}' not found in mapping. Skipping term '{term}'.")
-                continue
+# One result dict per CSV row from the pre-flight report, in file order. Rows the pre-flight rejected or
+# dropped as duplicates are marked "skipped" straight away (their problems were already reported); the rest
+# are "pending" and carry the create-page payload. Rows with a category path go under the sub-page it names.
+def read_upload_rows(preflight, parent_ids, subcategory_ids=None):
+    rows = []
+
+    for entry in preflight.rows:
+        # Titles are plain text in the REST API; escaping them here made "R&D" a page called "R&amp;D"
+        term = entry["term"]
+        result = {
+            "index": entry["index"],
+            "term": term,
+            "status": "skipped",
+            "page_id": None,
+            "parent_id": None,
+            "payload": None,
+            "messages": []
+        }
+        rows.append(result)
+
+        if not entry["valid"]:
+            continue
 
-            parent_title = mapping["parent_title"]
-            parent_page_id = get_pageid_by_title(parent_title, space_key, base_url, headers, auth, cloud)
+        category = entry["category"]
+        mapping = category_mapping[category]
+        parent_page_id = parent_ids.get(category)
 
+        if not parent_page_id:
+            result["messages"].append(f"Skipping term '{term}' due to missing parent page ID.")
+            continue
+        if entry["subcategory"]:
+            parent_page_id = (subcategory_ids or {}).get((category, entry["subcategory"]))
             if not parent_page_id:
-                print(f"Skipping term '{term}' due to missing parent page ID.")
+                path = " > ".join((mapping["parent_title"],) + entry["subcategory"])
+                result["messages"].append(f"Skipping term '{term}': no page '{path}' to put it under.")
                 continue
 
-            # Construct Page Properties and CSS Stylesheet macro content
-            page_properties_body = f"""
+        result["status"] = "pending"
+        result["parent_id"] = parent_page_id
+        result["definition_hash"] = definition_hash(entry["definition"])
+        labels = glossary_labels + [label for label in mapping.get("labels", []) if label not in glossary_labels]
+        result["payload"] = build_page_payload(term, html_format_multiline(entry["definition"]), parent_page_id,
+                                               labels)
+
+    return rows
+
+# Key a title is matched on: unescaped, so pages uploaded back when titles were HTML-escaped ("R&amp;D")
+# still match the plain CSV term, and case-folded, as Confluence titles are unique per space regardless of case
+def title_key(title):
+    return html.unescape(title).casefold()
+
+# One paginated scan of every page in the space, keyed by title_key. with_bodies also records each page's
+# version and definition hash for upserts; only the hash is kept, not the body.
+def build_title_index(client, page_size=200, with_bodies=False, on_event=None):
+    index = {}
+    params = {"spaceKey": space_key, "type": "page"}
+    expand = "ancestors,version,body.storage" if with_bodies else "ancestors"
+    for page in iter_paged_results(client, "/rest/api/content", params, page_size, expand,
+                                   what=f"pages in space '{space_key}'"):
+        ancestors = page.get("ancestors") or []
+        storage = page.get("body", {}).get("storage")
+        index[title_key(page["title"])] = {
+            "id": page["id"],
+            "title": page["title"],
+            "parent_id": ancestors[-1]["id"] if ancestors else None,
+            "version": page.get("version", {}).get("number"),
+            "definition_hash": page_definition_hash(storage["value"]) if storage is not None else None
+        }
+    report(on_event, f"Indexed {len(index)} existing page titles in space '{space_key}'")
+    return index
+
+# Marks pending rows whose title is already taken, without a request per row. A page with the same
+# title under the same parent is an earlier upload of this term ("exists"); anywhere else, or a
+# repeat of a term earlier in the CSV, is a "collision" the create call would reject.
+# With upsert, a page under any glossary category is instead "update" or, when the definition hash
+# and parent both match, "unchanged".
+def classify_existing_rows(rows, title_index, upsert=False, category_parent_ids=()):
+    claimed = dict(title_index)
+    for row in rows:
+        if row["status"] != "pending":
+            continue
+        key = title_key(row["payload"]["title"])
+        existing = claimed.get(key)
+
+        if existing is None:
+            claimed[key] = {"id": None, "title": row["payload"]["title"], "parent_id": row["parent_id"]}
+            continue
+
+        row["existing_id"] = existing["id"]
+        if existing["id"] is None:
+            row["status"] = "collision"
+            row["messages"].append(f"Skipping term '{row['term']}': duplicate of an earlier row in the CSV.")
+        elif upsert and (existing["parent_id"] == row["parent_id"] or existing["parent_id"] in category_parent_ids):
+            # Later rows with the same title are duplicates, not second updates of this page
+            claimed[key] = {"id": None, "title": row["payload"]["title"], "parent_id": row["parent_id"]}
+            row["existing_parent_id"] = existing["parent_id"]
+            row["existing_version"] = existing["version"]
+            row["existing_hash"] = existing["definition_hash"]
+            if existing["parent_id"] == row["parent_id"] and existing["definition_hash"] == row["definition_hash"]:
+                row["status"] = "unchanged"
+            else:
+                row["status"] = "update"
+        elif existing["parent_id"] == row["parent_id"]:
+            row["status"] = "exists"
+            row["messages"].append(f"Skipping term '{row['term']}': already exists (ID: {existing['id']}).")
+        else:
+            row["status"] = "collision"
+            row["messages"].append(f"Skipping term '{row['term']}': title already used by page "
+                                   f"{existing['id']} under a different parent.")
+
+# Carries an earlier run's progress over to freshly read rows: finished rows become "resumed" and are left
+# alone, pages created without labels become "label_pending". Everything else (pending, failed, skipped)
+# is worked out again as if for the first time.
+def apply_journal_states(rows, journal_states):
+    for row in rows:
+        if row["status"] != "pending" or row["index"] not in journal_states:
+            continue
+        state, page_id = journal_states[row["index"]]
+        if state in FINISHED_STATES:
+            row["status"] = "resumed"
+            row["page_id"] = page_id
+        elif state == "page_created":
+            row["status"] = "label_pending"
+            row["page_id"] = page_id
+            row["messages"].append(f"Resuming: page {row['term']} (ID: {page_id}) was created without labels.")
+
+# labels are attached by the create call itself through metadata.labels
+def build_page_payload(term, definition, parent_page_id, labels=()):
+    # Construct Page Properties and CSS Stylesheet macro content
+    page_properties_body = f"""
             <ac:structured-macro ac:name="details">
               <ac:rich-text-body>
                 <table>
@@ -107,76 +459,208 @@ def main(cloud, email, api_token, csv_file_path):
             </ac:structured-macro>
             """
 
-            # Payload to create Confluence page
-            payload = {
-                "type": "page",
-                "title": term,
-                "ancestors": [{"id": parent_page_id}],
-                "space": {"key": space_key},
-                "body": {
-                    "storage": {
-                        "value": page_properties_body,
-                        "representation": "storage"
-                    }
-                }
+    # Payload to create Confluence page
+    return {
+        "type": "page",
+        "title": term,
+        "ancestors": [{"id": parent_page_id}],
+        "space": {"key": space_key},
+        "body": {
+            "storage": {
+                "value": page_properties_body,
+                "representation": "storage"
             }
+        },
+        "metadata": {
+            "labels": [{"prefix": "global", "name": label} for label in labels]
+        }
+    }
 
-            # Create the page
-            create_response = requests.post(
-                f"{base_url}/rest/api/content",
-                headers=headers,
-                json=payload,
-                **({"auth": auth} if cloud else {})
-            )
+# Uploads the pending rows with at most max_in_flight rows in progress at once. New pages are created
+# with their labels in one request (or, for upserts, read -> update); the blocking requests calls run on
+# a thread pool of the same size. If the server rejects labels in the create payload, that row is
+# created again without them and every later row falls back to create -> label.
+# When a journal is given, every change of a row's state is recorded in it (from the event loop thread
+# only, so the SQLite connection is never shared between threads).
+# A "progress" event is emitted as each row finishes; once cancel_event is set, rows not yet started
+# are marked "cancelled" instead of uploaded. A connection error fails only the row it happened on.
+async def upload_rows_async(client, rows, max_in_flight=8, journal=None, on_event=None, cancel_event=None):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    inline_labels = {"rejected": False}
 
-            if create_response.status_code in (200, 201):
-                page_id = create_response.json()["id"]
-                print(f"Created page: {term} (ID: {page_id})")
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        async def call(method, *args, **kwargs):
+            return await loop.run_in_executor(executor, partial(method, *args, **kwargs))
 
-                # Add labels: category-specific + 'glossary-terms'
-                labels = [
-                    {"prefix": "global", "name": "glossary-terms"}
-                ]
+        def checkpoint(row, error=None):
+            if journal is not None:
+                journal.record_row(row, error)
 
-                label_response = requests.post(
-                    f"{base_url}/rest/api/content/{page_id}/label",
-                    headers=headers,
-                    json=labels,
-                    **({"auth": auth} if cloud else {})
-                )
+        async def update_row(row):
+            term = row["term"]
+            page_id = row["existing_id"]
+            version = row["existing_version"]
 
-                if label_response.status_code in (200, 204):
-                    print(f"Added labels to: {term}")
+            # Up to two attempts: a 409 means someone else saved the page since we read its version
+            for attempt in range(2):
+                if version is None or row["existing_hash"] is None:
+                    page_response = await call(client.get, f"/rest/api/content/{page_id}",
+                                               params={"expand": "body.storage,version"})
+                    if page_response.status_code != 200:
+                        row["status"] = "failed"
+                        row["messages"] += [
+                            f"Failed to read page for update: {term}",
+                            f"Status: {page_response.status_code}",
+                            page_response.text
+                        ]
+                        checkpoint(row, f"read {page_response.status_code}")
+                        return
+                    page = page_response.json()
+                    version = page["version"]["number"]
+                    row["existing_hash"] = page_definition_hash(page["body"]["storage"]["value"])
+                    if row["existing_parent_id"] == row["parent_id"] and row["existing_hash"] == row["definition_hash"]:
+                        row["status"] = "unchanged"
+                        checkpoint(row)
+                        return
+
+                # Labels of an existing page are left as they are
+                payload = {key: value for key, value in row["payload"].items() if key != "metadata"}
+                payload.update(id=page_id, version={"number": version + 1})
+                update_response = await call(client.put, f"/rest/api/content/{page_id}", json=payload)
+
+                if update_response.status_code == 200:
+                    row["page_id"] = page_id
+                    row["status"] = "updated"
+                    row["messages"].append(f"Updated page: {term} (ID: {page_id}, version {version + 1})")
+                    checkpoint(row)
+                    return
+                if update_response.status_code != 409 or attempt:
+                    break
+                version = None
+
+            row["status"] = "failed"
+            row["messages"] += [
+                f"Failed to update page: {term}",
+                f"Status: {update_response.status_code}",
+                update_response.text
+            ]
+            checkpoint(row, f"update {update_response.status_code}")
+
+        work = [row for row in rows if row["status"] in UPLOAD_WORK_STATUSES]
+        progress = {"done": 0}
+
+        async def run_row(row):
+            async with semaphore:
+                if cancelled(cancel_event):
+                    row["status"] = "cancelled"
+                    row["messages"].append(f"Cancelled before upload: {row['term']}")
                 else:
-                    print(f"Failed to add labels for: {term} ({label_response.status_code})")
-                    print(label_response.text)
+                    try:
+                        await upload_row(row)
+                    except requests.RequestException as error:
+                        connection_failed(row, error)
+            progress["done"] += 1
+            emit(on_event, "progress", done=progress["done"], total=len(work), status=row["status"],
+                 messages=list(row["messages"]))
 
+        # A request that never got an answer fails only its own row. A page created before the error is
+        # journaled as created, so a resumed run still adds its labels.
+        def connection_failed(row, error):
+            if row["page_id"] and row["status"] in ("created", "label_pending"):
+                row["status"] = "label_failed"
+                row["messages"].append(f"Failed to add labels for: {row['term']} ({error})")
             else:
-                print(f"Failed to create page: {term}")
-                print(f"Status: {create_response.status_code}")
-                print(create_response.text)
+                row["status"] = "failed"
+                row["messages"].append(f"Failed to upload page: {row['term']} ({error})")
+            checkpoint(row, str(error))
+
+        async def upload_row(row):
+            term = row["term"]
+
+            if row["status"] == "update":
+                await update_row(row)
+                return
+
+            labels = row["payload"]["metadata"]["labels"]
+            without_labels = {key: value for key, value in row["payload"].items() if key != "metadata"}
+
+            if row["status"] == "label_pending":
+                page_id = row["page_id"]
+            else:
+                # Create the page, labels included
+                labeled_inline = bool(labels) and not inline_labels["rejected"]
+                create_response = await call(client.post, "/rest/api/content",
+                                             json=row["payload"] if labeled_inline else without_labels)
+
+                # A 400 may be this server refusing metadata.labels; try once more without them
+                if create_response.status_code == 400 and labeled_inline:
+                    retry_response = await call(client.post, "/rest/api/content", json=without_labels)
+                    if retry_response.status_code in (200, 201):
+                        if not inline_labels["rejected"]:
+                            inline_labels["rejected"] = True
+                            report(on_event, "Inline labels rejected by the server; "
+                                             "adding labels with a separate call.")
+                        labeled_inline = False
+                    create_response = retry_response
+
+                if create_response.status_code not in (200, 201):
+                    row["status"] = "failed"
+                    row["messages"] += [
+                        f"Failed to create page: {term}",
+                        f"Status: {create_response.status_code}",
+                        create_response.text
+                    ]
+                    checkpoint(row, f"create {create_response.status_code}")
+                    return
+
+                page_id = create_response.json()["id"]
+                row["page_id"] = page_id
+                row["status"] = "created"
+                row["messages"].append(f"Created page: {term} (ID: {page_id})")
+
+                if labeled_inline or not labels:
+                    row["status"] = "labeled"
+                    if labels:
+                        row["messages"].append(f"Added labels to: {term}")
+                    checkpoint(row)
+                    return
+                checkpoint(row)
+
+            # Fallback: category-specific + glossary labels in a separate call
+            label_response = await call(client.post, f"/rest/api/content/{page_id}/label", json=labels)
+
+            if label_response.status_code in (200, 204):
+                row["status"] = "labeled"
+                row["messages"].append(f"Added labels to: {term}")
+                checkpoint(row)
+            else:
+                row["status"] = "label_failed"
+                row["messages"] += [
+                    f"Failed to add labels for: {term} ({label_response.status_code})",
+                    label_response.text
+                ]
+                checkpoint(row, f"label {label_response.status_code}")
+
+        await asyncio.gather(*(run_row(row) for row in work))
+
+    return rows
 
 
 # ---------- This program can verify your credentials allow you to connect to REST API ----------
-def verify_rest_connection(cloud, email, token):
+# (connect, read) timeout in seconds for the connection test
+VERIFY_TIMEOUT = (5, 15)
+
+def verify_rest_connection(cloud, email, token, base_url=None):
     if cloud:
         if not email or not token:
             raise ValueError("Email and API Token required for cloud connection.")
-        auth = (email, token)
-        base_url = "https://tylertech.atlassian.net/wiki"
-        headers = { "Content-Type": "application/json" }
-    else:
-        if not token:
-            raise ValueError("PAT required for server connection.")
-        auth = None
-        base_url = "https://confl.tylertech.com"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
+    elif not token:
+        raise ValueError("PAT required for server connection.")
 
-    url = f"{base_url}/rest/api/user/current"
-    response = requests.get(url, headers=headers, **({"auth": auth} if cloud else {}))
+    # One quick attempt: the UI waits on this call, so an unreachable host must fail at once, not after retries
+    with ConfluenceClient(cloud, email, token, base_url=base_url, timeout=VERIFY_TIMEOUT, max_retries=0) as client:
+        response = client.get("/rest/api/user/current")
 
     if response.status_code == 200:
         try:
@@ -196,109 +680,510 @@ def verify_rest_connection(cloud, email, token):
         return False
 
 
-def get_child_pages(parent_page_id, base_url, headers, auth, cloud):
-    url = f"{base_url}/rest/api/content/{parent_page_id}/child/page"
-    response = requests.get(url, headers=headers, **({"auth": auth} if cloud else {}))
-    if response.status_code == 200:
-        return response.json().get("results", [])
-    else:
-        print(f"Failed to get child pages for parent {parent_page_id}")
-        return []
+# Walks any paginated REST listing with start/limit until Confluence stops returning a _links.next,
+# yielding each result as soon as its batch arrives. `what` names the listing in failure messages.
+# A batch that still fails once the fallbacks below are used up raises ConfluenceReadError, so callers
+# never mistake a truncated listing for a complete one.
+def iter_paged_results(client, url, params=None, page_size=200, expand=None, what="results"):
+    start = 0
+    limit = page_size
+    while True:
+        batch_params = dict(params or {}, start=start, limit=limit)
+        if expand:
+            batch_params["expand"] = expand
+        response = client.get(url, params=batch_params)
+        if response.status_code != 200:
+            # Some servers refuse large expanded batches, so shrink the batch before giving up
+            # on the expansion; pages listed without a body are fetched one at a time instead.
+            # Auth and missing-page errors won't improve with a smaller batch.
+            refused = expand and response.status_code not in (401, 403, 404)
+            if refused and limit > 25:
+                limit = max(25, limit // 2)
+                continue
+            # Keep cheap expansions such as version; only the bodies are dropped
+            reduced_expand = ",".join(field for field in expand.split(",") if field != "body.storage") or None \
+                if refused else expand
+            if refused and reduced_expand != expand:
+                client.log(f"Expanded listing of {what} refused ({response.status_code}); "
+                           f"falling back to per-page fetches")
+                expand = reduced_expand
+                limit = page_size
+                continue
+            raise ConfluenceReadError(f"Failed to get {what} (start {start}, status {response.status_code})")
 
-def get_page_content(page_id, base_url, headers, auth, cloud):
-    url = f"{base_url}/rest/api/content/{page_id}?expand=body.storage"
-    response = requests.get(url, headers=headers, **({"auth": auth} if cloud else {}))
-    if response.status_code == 200:
-        return response.json()["body"]["storage"]["value"]
-    else:
-        print(f"Failed to get content for page {page_id}")
-        return ""
+        data = response.json()
+        results = data.get("results", [])
+        yield from results
+
+        # The server may cap the limit below page_size, so advance by what actually came back
+        next_link = data.get("_links", {}).get("next")
+        if not results or not next_link:
+            return
+        start += len(results)
+        # Cloud's CQL search pages with a cursor instead of start offsets
+        cursor = parse_qs(urlparse(next_link).query).get("cursor")
+        if cursor:
+            params = dict(params or {}, cursor=cursor[0])
+
+# With expand="body.storage" every child page comes back with its body, so the export doesn't need
+# a request per term
+def iter_child_pages(parent_page_id, client, page_size=200, expand=None):
+    url = f"/rest/api/content/{parent_page_id}/child/page"
+    return iter_paged_results(client, url, page_size=page_size, expand=expand,
+                              what=f"child pages for parent {parent_page_id}")
+
+def get_child_pages(parent_page_id, client, page_size=200, expand=None):
+    return list(iter_child_pages(parent_page_id, client, page_size, expand))
 
+# Raises ConfluenceReadError if the body can't be read: an empty definition would otherwise be cached
+# against the page's current version and kept until the page is next edited
+def get_page_content(page_id, client):
+    response = client.get(f"/rest/api/content/{page_id}", params={"expand": "body.storage"})
+    if response.status_code != 200:
+        raise ConfluenceReadError(f"Failed to get content for page {page_id} ({response.status_code})")
+    return response.json()["body"]["storage"]["value"]
 
+
+# One token per tag, comment, CDATA section or declaration. Text is whatever lies between two tokens.
+_STORAGE_TOKEN = re.compile(
+    r"<(?:!--.*?-->|!\[CDATA\[.*?\]\]>|[!?][^>]*>|(/?)([A-Za-z][^\s/>]*)[^>]*?(/?)>)",
+    re.DOTALL
+)
+_TABLE_OPEN = re.compile(r"<table", re.IGNORECASE)
+
+
+# Single-pass, event-driven read of the definition cell of a glossary page: the first <td> of the
+# first <table>. It skips straight to that table, walks one tag at a time and stops as soon as the
+# cell closes, so the rest of the page is never scanned. Table nesting is tracked, so a table nested
+# inside the cell doesn't end it early, and every <p> is its own paragraph, so paragraphs inside
+# ac: macros are kept apart.
 def extract_definition_from_html(html_content):
-    # Extract first <table>...</table>
-    match = re.search(r"<table.*?>(.*?)</table>", html_content, re.DOTALL | re.IGNORECASE)
-    if not match:
+    table_start = _TABLE_OPEN.search(html_content)
+    if not table_start:
         return ""
-    table_html = match.group(1)
 
-    # Extract first <td>...</td>
-    td_match = re.search(r"<td.*?>(.*?)</td>", table_html, re.DOTALL | re.IGNORECASE)
-    if not td_match:
-        return ""
+    table_depth = 0
+    cell_depth = None           # table depth of the definition cell once it opens
+    cell_text = []              # all text in the cell
+    paragraphs = []
+    paragraph = None            # text of the open paragraph, if any
+    found = False
+    position = table_start.start()
 
-    td_html = td_match.group(1)
+    for token in _STORAGE_TOKEN.finditer(html_content, position):
+        if cell_depth is not None and token.start() > position:
+            data = html_content[position:token.start()]
+            cell_text.append(data)
+            if paragraph is not None:
+                paragraph.append(data)
+        position = token.end()
 
-    # Find all <p>...</p> inside the td
-    paragraphs = re.findall(r"<p.*?>(.*?)</p>", td_html, re.DOTALL | re.IGNORECASE)
+        tag = token.group(2)
+        if tag is None:
+            # Comment, CDATA section or declaration: not part of the definition text
+            continue
+        tag = tag.lower()
+        closing = token.group(1)
+        self_closing = token.group(3)
 
-    # If no <p> found, fallback to plain text inside td
+        if tag == "table":
+            if closing:
+                if cell_depth == table_depth:
+                    # Closing the cell's own table also closes the cell
+                    found = True
+                    break
+                table_depth -= 1
+                if not table_depth:
+                    # The first table closed without a definition cell
+                    break
+            elif not self_closing:
+                table_depth += 1
+        elif cell_depth is None:
+            if tag == "td" and not closing and table_depth:
+                cell_depth = table_depth
+        elif tag == "p":
+            if paragraph is not None:
+                paragraphs.append("".join(paragraph))
+                paragraph = None
+            if not closing:
+                if self_closing:
+                    paragraphs.append("")
+                else:
+                    paragraph = []
+        elif tag == "td" and closing and table_depth == cell_depth:
+            found = True
+            break
+
+    if not found:
+        return ""
+    if paragraph is not None:
+        paragraphs.append("".join(paragraph))
+
+    # If no <p> found, fall back to the plain text inside the td
     if not paragraphs:
-        # Remove any remaining tags
-        text = re.sub(r"<.*?>", "", td_html)
-        return html.unescape(text).strip()
-
-    # Unescape HTML entities and strip tags inside each <p>
-    clean_paragraphs = []
-    for p in paragraphs:
-        # Remove tags inside paragraph if any remain
-        p_text = re.sub(r"<.*?>", "", p)
-        p_text = html.unescape(p_text).strip()
-        clean_paragraphs.append(p_text)
-
-    # Join paragraphs with newlines
-    definition = "\n".join(clean_paragraphs)
-
-    # Normalize whitespace
+        return html.unescape("".join(cell_text)).strip()
+
+    # Unescape HTML entities in each paragraph and join them with newlines
+    return normalize_definition("\n".join(html.unescape(p) for p in paragraphs))
+
+# Whitespace normalization of a definition's text: each line stripped, runs of spaces and tabs collapsed,
+# blank lines dropped
+def normalize_definition(text):
+    definition = "\n".join(line.strip() for line in text.split("\n"))
     definition = re.sub(r"[ \t]+", " ", definition)
     definition = re.sub(r"\n\s*\n", "\n", definition)
-
     return definition.strip()
 
 
-def export_glossary_to_csv(cloud, email, api_token, csv_file_path):
-    if cloud:
-        auth = (email, api_token)
-        base_url = "https://tylertech.atlassian.net/wiki"
-        headers = {"Content-Type": "application/json"}
+# Hash of the definition as the export would print it. Pages are hashed on what extract_definition_from_html
+# reads from their body, CSV rows on their text after the same normalization, so an exported term pushed
+# back unchanged compares equal however its page was edited.
+def definition_hash(definition):
+    return hashlib.sha256(normalize_definition(definition).encode("utf-8")).hexdigest()
+
+def page_definition_hash(storage_html):
+    return definition_hash(extract_definition_from_html(storage_html))
+
+
+# body_cache_path turns on incremental exports: definitions are cached by page ID and version number,
+# and only pages whose version changed since the last export have their bodies fetched and parsed.
+def export_glossary_to_csv(cloud, email, api_token, csv_file_path, max_workers=8, page_size=200,
+                           expand_bodies=True, body_cache_path=None, pipeline_depth=None, base_url=None,
+                           max_requests_per_second=50, metrics_path=None, on_event=None, cancel_event=None,
+                           max_depth=10, source="tree", index_path=None, outputs=None):
+    # One pooled connection per worker thread, plus one for the listing
+    with ConfluenceClient(cloud, email, api_token, base_url=base_url, pool_size=max_workers + 1,
+                          max_requests_per_second=max_requests_per_second, log=partial(report, on_event)) as client:
+        try:
+            return export_terms(client, csv_file_path, max_workers, page_size, expand_bodies, body_cache_path,
+                                pipeline_depth, on_event, cancel_event, max_depth, source, index_path, outputs)
+        finally:
+            report_metrics(client, metrics_path, operation="export", csv_file_path=csv_file_path,
+                           outputs=[path for _, path in outputs or ()])
+
+# Streams the export: list pages -> fetch/parse bodies on the pool -> write rows, in category then child
+# order. At most pipeline_depth (default 4 per worker) bodies are held at once besides the listing batch.
+# Returns the number of terms written. Setting cancel_event stops the export with OperationCancelled,
+# leaving any existing CSV untouched.
+# Terms nested under sub-grouping pages are found by crawling each category up to max_depth levels down
+# (see crawl_glossary_pages); their Category is the whole path, e.g. "Enterprise Tools > Reports".
+# max_depth=1 reads direct children only, streaming the listing one batch at a time.
+# source="label" skips the tree entirely: one CQL search for the glossary label returns every term with its
+# ancestors, in ceil(terms / page_size) requests however many categories there are (see iter_labeled_pages).
+# With index_path the offline search index (glossary_index.py) is brought up to date as well; its page
+# versions double as a body cache, so unchanged terms are neither fetched nor rewritten. The index is
+# optional: if it can't be opened or updated, the export reports it and goes on without it.
+# outputs adds more files written in the same pass, as [(format, path)] with a format from export_sinks.SINKS,
+# e.g. [("jsonl", "glossary.jsonl"), ("parquet", "glossary.parquet")]; csv_file_path may then be None.
+def export_terms(client, csv_file_path, max_workers=8, page_size=200, expand_bodies=True, body_cache_path=None,
+                 pipeline_depth=None, on_event=None, cancel_event=None, max_depth=10, source="tree",
+                 index_path=None, outputs=None):
+    if source not in ("tree", "label"):
+        raise ValueError(f"Unknown export source '{source}'; use 'tree' or 'label'.")
+    outputs = ([("csv", csv_file_path)] if csv_file_path else []) + list(outputs or ())
+    if not outputs:
+        raise ValueError("Nothing to export to; give a CSV path or at least one output.")
+    for export_format, _ in outputs:
+        if export_format not in SINKS:
+            raise ValueError(f"Unknown export format '{export_format}'; use one of {', '.join(SINKS)}.")
+    body_cache = load_json_cache(body_cache_path)
+    index = None
+    if index_path:
+        try:
+            index = GlossaryIndex(index_path)
+            for page_id, entry in index.entries().items():
+                body_cache.setdefault(page_id, {"version": entry["version"], "definition": entry["definition"]})
+        except (RuntimeError, OSError, sqlite3.Error) as e:
+            report(on_event, f"Warning: offline index '{index_path}' unavailable ({e}); exporting without it.")
+            if index is not None:
+                index.close()
+                index = None
+    try:
+        return export_rows(client, outputs, max_workers, page_size, expand_bodies, body_cache_path,
+                           body_cache, index, pipeline_depth, on_event, cancel_event, max_depth, source)
+    finally:
+        if index is not None:
+            index.close()
+
+def export_rows(client, outputs, max_workers, page_size, expand_bodies, body_cache_path, body_cache, index,
+                pipeline_depth, on_event, cancel_event, max_depth, source):
+    # Only list the bodies inline when expand_bodies is on; otherwise every term costs a request.
+    # With a warm cache the listing only needs versions, and just the changed bodies are fetched.
+    needs_version = body_cache_path or index is not None or any(
+        SINKS[export_format].needs_version for export_format, _ in outputs)
+    if body_cache:
+        listing_expand = "version"
+    elif needs_version:
+        listing_expand = "version,body.storage" if expand_bodies else "version"
     else:
-        base_url = "https://confl.tylertech.com"
-        auth = None
-        headers = {
-            "Authorization": f"Bearer {api_token}",
-            "Content-Type": "application/json"
+        listing_expand = "body.storage" if expand_bodies else None
+
+    # Returns a None record for grouping pages (pages with sub-pages and no definition of their own)
+    def fetch_row(page, category_path, has_children):
+        version = page.get("version", {}).get("number")
+        cached = body_cache.get(page["id"])
+
+        if version is not None and cached and cached["version"] == version:
+            definition = cached["definition"]
+            from_cache = True
+        else:
+            storage = page.get("body", {}).get("storage")
+            if storage is not None:
+                content_html = storage.get("value", "")
+            else:
+                content_html = get_page_content(page["id"], client)
+            definition = extract_definition_from_html(content_html)
+            from_cache = False
+
+        record = {
+            "page_id": page["id"],
+            "version": version,
+            "last_modified": page.get("version", {}).get("when"),
+            "term": page["title"],
+            "definition": definition,
+            "category": " > ".join(category_path),
+            "ancestors": list(category_path)
         }
+        if has_children and not definition:
+            record = None
+        return page["id"], record, {"version": version, "definition": definition}, from_cache
 
-    rows = []
+    cache_entries = {}
+    index_rows = []
+    reused = 0
+    written = 0
+
+    # Records go to each sink's temp file as they arrive and only replace the outputs once the export
+    # finished, so a failed run never leaves a half-written file where a good one used to be
+    sinks = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        if source == "label":
+            pages = iter_labeled_pages(client, page_size, listing_expand, on_event)
+        elif max_depth > 1:
+            pages = crawl_glossary_pages(client, executor, export_parent_ids(client), page_size,
+                                         listing_expand, max_depth, on_event)
+        else:
+            pages = iter_glossary_pages(client, export_parent_ids(client), page_size, listing_expand, on_event)
+
+        try:
+            for export_format, path in outputs:
+                sinks.append(open_sink(export_format, path))
+            # The number of terms isn't known until the listing ends
+            emit(on_event, "start", operation="export", total=None)
+            for page_id, record, entry, from_cache in iter_in_order(executor, fetch_row, pages,
+                                                                    pipeline_depth or 4 * max(1, max_workers)):
+                if cancelled(cancel_event):
+                    raise OperationCancelled("Export cancelled")
+                if body_cache_path:
+                    cache_entries[page_id] = entry
+                    reused += from_cache
+                if record is None:
+                    continue
+                if index is not None:
+                    index_rows.append((page_id, entry["version"], record["term"], record["definition"],
+                                       record["category"]))
+                for sink in sinks:
+                    sink.write(record)
+                written += 1
+                emit(on_event, "progress", done=written, total=None)
+                if written % 100 == 0:
+                    for sink in sinks:
+                        sink.flush()
+        except BaseException:
+            # Stop the listing while the pool is still up to take (or refuse) its last requests
+            pages.close()
+            for sink in sinks:
+                sink.close()
+            if sinks:
+                tmp_paths = ", ".join(sink.tmp_path for sink in sinks)
+                report(on_event, f"Export stopped after {written} terms; partial output left in {tmp_paths}")
+            raise
+    for sink in sinks:
+        sink.commit()
+
+    if body_cache_path:
+        # Rewriting the cache from this run's pages also drops pages deleted since the last export
+        save_json_cache(body_cache_path, cache_entries)
+        report(on_event, f"Reused {reused} unchanged terms from the cache; "
+                         f"fetched {len(cache_entries) - reused} changed terms.")
+
+    if index is not None:
+        try:
+            added, updated, removed = index.sync(index_rows)
+        except sqlite3.Error as e:
+            report(on_event, f"Warning: offline index not updated ({e}); the exported files are complete.")
+        else:
+            report(on_event, f"Offline index updated: {added} added, {updated} changed, {removed} removed "
+                             f"({len(index_rows) - added - updated} unchanged).")
+
+    report(on_event, f"Export complete. {written} terms written to {', '.join(path for _, path in outputs)}")
+    emit(on_event, "finished", operation="export", counts={"written": written})
+    return written
 
+# Parent page IDs for a tree export. A category whose parent page can't be found would silently drop all
+# of its terms from the outputs, the body cache and the offline index, so that stops the export instead.
+def export_parent_ids(client):
+    parent_ids = resolve_parent_page_ids(client)
+    missing = [category for category in category_mapping if not parent_ids.get(category)]
+    if missing:
+        raise ConfluenceReadError(f"Couldn't find the parent page for {', '.join(missing)}; "
+                                  f"nothing was exported.")
+    return parent_ids
+
+# Enumerates every term page with its category title, one listing batch at a time, in category order
+def iter_glossary_pages(client, parent_ids, page_size=200, expand=None, on_event=None):
     for category_key, mapping in category_mapping.items():
         parent_title = mapping["parent_title"]
-        parent_page_id = get_pageid_by_title(parent_title, space_key, base_url, headers, auth, cloud)
+        parent_page_id = parent_ids.get(category_key)
         if not parent_page_id:
-            print(f"Skipping category '{category_key}' due to missing parent page ID.")
+            report(on_event, f"Skipping category '{category_key}' due to missing parent page ID.")
             continue
 
-        child_pages = get_child_pages(parent_page_id, base_url, headers, auth, cloud)
-        print(f"Found {len(child_pages)} terms in category '{category_key}'")
+        child_count = 0
+        for page in iter_child_pages(parent_page_id, client, page_size, expand):
+            yield page, [parent_title], False
+            child_count += 1
+        report(on_event, f"Found {child_count} terms in category '{category_key}'")
 
-        for page in child_pages:
-            term = page["title"]
-            page_id = page["id"]
-            content_html = get_page_content(page_id, base_url, headers, auth, cloud)
-            definition = extract_definition_from_html(content_html)
+# Every page in the space carrying the glossary label, from one paginated CQL search. The category path
+# comes from each page's ancestors: from the nearest category parent page down to the page's own parent.
+# Labeled pages outside the glossary categories are left out and counted.
+def iter_labeled_pages(client, page_size=200, expand=None, on_event=None):
+    expand = ",".join(field for field in (expand, "ancestors") if field)
+    cql = f'label = "{glossary_label}" and space = "{space_key}" and type = page'
+    parent_titles = {mapping["parent_title"] for mapping in category_mapping.values()}
+    found = 0
+    outside = 0
 
-            rows.append({
-                "Term": term,
-                "Definition": definition,
-                "Category": parent_title
-            })
-
-    # Write to CSV
-    with open(csv_file_path, mode='w', encoding='utf-8', newline='') as csvfile:
-        fieldnames = ["Term", "Definition", "Category"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+    for page in iter_paged_results(client, "/rest/api/content/search", {"cql": cql}, page_size, expand,
+                                   what=f"pages labeled '{glossary_label}'"):
+        titles = [ancestor["title"] for ancestor in page.get("ancestors") or []]
+        category_index = next((i for i in range(len(titles) - 1, -1, -1) if titles[i] in parent_titles), None)
+        if category_index is None:
+            outside += 1
+            continue
+        found += 1
+        yield page, titles[category_index:], False
+
+    report(on_event, f"Found {found} terms labeled '{glossary_label}'")
+    if outside:
+        report(on_event, f"Skipped {outside} labeled pages that aren't under a glossary category")
+
+# Crawls every category's page tree, breadth first, max_depth levels down (1 = direct children).
+# Each child listing runs on the executor and queues the listings of its own sub-pages as soon as it
+# returns, so categories and branches are listed in parallel and the crawl takes about as long as the
+# deepest chain rather than the sum of all nodes. Listings expand children.page so leaf terms cost no extra
+# request. A visited set drops pages seen before (cycles, or a page listed under two parents).
+# Yields (page, category path, has_children) in tree order: a page, its subtree, then its next sibling.
+# Listings hold their pages (bodies included when expanded), so at most max_listings of them are running
+# or waiting to be walked at once; the rest start as walked listings are released, or as soon as the walk
+# reaches them. Each page is dropped from its listing once yielded, so only the rows still queued keep it.
+def crawl_glossary_pages(client, executor, parent_ids, page_size=200, expand=None, max_depth=10, on_event=None,
+                         max_listings=16):
+    expand = ",".join(field for field in (expand, "children.page") if field)
+    visited = set(parent_ids.values())
+    lock = threading.Lock()
+    stopped = threading.Event()
+    # Listings not started yet because max_listings were held, oldest first
+    deferred = deque()
+    held = {"listings": 0}
+
+    # One page's children as a deque of (page, listing of its children or None, whether it has children)
+    def list_children(page_id, depth):
+        children = deque()
+        for page in iter_child_pages(page_id, client, page_size, expand):
+            if stopped.is_set():
+                return deque()
+            with lock:
+                if page["id"] in visited:
+                    continue
+                visited.add(page["id"])
+            # Servers that don't expand children.page leave it out; look to be safe
+            child_pages = page.get("children", {}).get("page")
+            has_children = child_pages is not None and child_pages.get("size", 0) > 0
+            subtree = None
+            if (has_children or child_pages is None) and depth < max_depth:
+                subtree = schedule(page["id"], depth + 1)
+            children.append((page, subtree, has_children))
+        return children
+
+    def start(listing):
+        held["listings"] += 1
+        listing["future"] = executor.submit(list_children, *listing["args"])
+
+    # A listing is {"args", "future"}; its future stays None while it is deferred
+    def schedule(page_id, depth):
+        listing = {"args": (page_id, depth), "future": None}
+        with lock:
+            if held["listings"] < max_listings and not stopped.is_set():
+                start(listing)
+            else:
+                deferred.append(listing)
+        return listing
+
+    def result(listing):
+        with lock:
+            if listing["future"] is None:
+                # The walk needs it now, whatever else is held
+                deferred.remove(listing)
+                start(listing)
+        return listing["future"].result()
+
+    def release():
+        with lock:
+            held["listings"] -= 1
+            while deferred and held["listings"] < max_listings and not stopped.is_set():
+                start(deferred.popleft())
+
+    def walk(listing, path):
+        children = result(listing)
+        try:
+            while children:
+                page, subtree, has_children = children.popleft()
+                sub_pages = result(subtree) if subtree else None
+                yield page, path, has_children or bool(sub_pages)
+                if sub_pages:
+                    yield from walk(subtree, path + [page["title"]])
+                elif subtree:
+                    release()
+        except GeneratorExit:
+            # The export stopped early; start nothing more
+            stopped.set()
+            raise
+        finally:
+            release()
+
+    categories = []
+    for category_key, mapping in category_mapping.items():
+        parent_page_id = parent_ids.get(category_key)
+        if not parent_page_id:
+            report(on_event, f"Skipping category '{category_key}' due to missing parent page ID.")
+            continue
+        categories.append((category_key, mapping["parent_title"], schedule(parent_page_id, 1)))
+
+    try:
+        for category_key, parent_title, listing in categories:
+            child_count = 0
+            for page, path, has_children in walk(listing, [parent_title]):
+                yield page, path, has_children
+                child_count += not has_children
+            report(on_event, f"Found {child_count} terms in category '{category_key}'")
+    finally:
+        # Stop listings nobody will read if the export ended early
+        stopped.set()
 
-    print(f"Export complete. {len(rows)} terms written to {csv_file_path}")
+# Runs func(*item) on the executor for each item, with at most `depth` calls queued or running, and
+# yields the results in input order. Memory stays bounded by depth however long `items` is.
+def iter_in_order(executor, func, items, depth):
+    queued = deque()
+    try:
+        for item in items:
+            queued.append(executor.submit(func, *item))
+            if len(queued) >= depth:
+                yield queued.popleft().result()
+        while queued:
+            yield queued.popleft().result()
+    finally:
+        # Don't start work nobody will read if the consumer stopped early
+        for future in queued:
+            future.cancel()
@@ -0,0 +1,397 @@
+###############################################################################################################
+#
+#
+# Shared connection to the Confluence REST API used by bulkTerms_Confluence.py.
+# One ConfluenceClient owns a requests.Session, so every upload, export and verify call reuses a small
+# pool of keep-alive connections instead of opening a new TCP + TLS connection per request.
+# The cloud/server switch (base URL, headers and auth) lives here and nowhere else.
+#
+# Every call also goes through a shared throttle, so big batches slow down instead of losing rows:
+# - a token bucket caps the request rate; the rate halves on every throttled response and recovers
+#   gradually back to the configured ceiling
+# - 429/503 responses are retried, waiting for Retry-After / X-RateLimit-Reset when the server sends them,
+#   otherwise backing off exponentially with jitter
+# - the number of requests in flight halves on every throttled response and creeps back up while
+#   responses stay healthy
+#
+# Every HTTP exchange (retries included) is also counted in client.metrics per endpoint category:
+# requests, status codes, latency percentiles and bytes, printed with print_summary() / saved with save().
+#
+# Retry and throttle notices go to the log callable given to the client (print by default), so a caller
+# with a window can show them there.
+#
+#
+###############################################################################################################
+
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CLOUD_BASE_URL = "https://tylertech.atlassian.net/wiki"
+SERVER_BASE_URL = "https://confl.tylertech.com"
+
+# (connect, read) timeout in seconds applied to every request that doesn't pass its own
+DEFAULT_TIMEOUT = (10, 60)
+
+# Responses that mean "slow down and try again" rather than "this request is wrong"
+RETRY_STATUSES = (429, 503)
+
+# Never sleep longer than this on a single Retry-After / X-RateLimit-Reset, whatever the server asks for
+MAX_PAUSE_SECONDS = 300
+
+# Throttled responses closer together than this are treated as one signal when shrinking rate/concurrency
+THROTTLE_COOLDOWN_SECONDS = 1.0
+
+
+# Caps the request rate at `rate` per second, allowing short bursts of up to `burst` requests.
+# slow_down()/speed_up() move the rate between min_rate and the starting rate.
+class TokenBucket:
+    def __init__(self, rate, burst=None, min_rate=1):
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.last_slow_down = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self):
+        with self.lock:
+            # A burst of 429s from requests that were already in flight counts as one signal
+            now = time.monotonic()
+            if now - self.last_slow_down < THROTTLE_COOLDOWN_SECONDS:
+                return
+            self.last_slow_down = now
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def speed_up(self, factor=1.05):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * factor)
+
+
+# Limits how many requests are in flight at once. The limit halves when the server throttles us and
+# grows by one after every `increase_after` healthy responses, up to `maximum`.
+class AdaptiveConcurrencyLimit:
+    def __init__(self, maximum, minimum=1, increase_after=20):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = self.maximum
+        self.increase_after = increase_after
+        self.in_flight = 0
+        self.healthy_streak = 0
+        self.last_throttled = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_throttled(self):
+        with self.condition:
+            self.healthy_streak = 0
+            # Same burst rule as TokenBucket.slow_down
+            now = time.monotonic()
+            if now - self.last_throttled < THROTTLE_COOLDOWN_SECONDS:
+                return
+            self.last_throttled = now
+            self.limit = max(self.minimum, self.limit // 2)
+
+    def on_success(self):
+        with self.condition:
+            self.healthy_streak += 1
+            if self.healthy_streak >= self.increase_after and self.limit < self.maximum:
+                self.limit += 1
+                self.healthy_streak = 0
+                self.condition.notify_all()
+
+
+# Upper bounds (ms) of the latency histogram buckets in the metrics JSON; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+# Names the kind of call a request is, so a run's time can be split into lookups, creates, labels, ...
+def endpoint_category(method, path, params=None):
+    path = re.sub(r"^https?://[^/]+", "", path).split("?", 1)[0]
+    path = path[path.find("/rest/api/"):] if "/rest/api/" in path else path
+    if path == "/rest/api/content":
+        if method == "POST":
+            return "create page"
+        return "title lookup" if params and "title" in params else "content listing"
+    if path == "/rest/api/user/current":
+        return "current user"
+    if path == "/rest/api/content/search":
+        return "search"
+    if re.fullmatch(r"/rest/api/content/\d+", path):
+        return "update page" if method == "PUT" else "read page"
+    if re.fullmatch(r"/rest/api/content/\d+/child/page", path):
+        return "child pages"
+    if re.fullmatch(r"/rest/api/content/\d+/label", path):
+        return "labels"
+    return method + " " + re.sub(r"/\d+", "/{id}", path)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+# Per-category counters for every request a ConfluenceClient sends. Latencies are kept as raw samples
+# (a float per request) and only turned into percentiles and histogram buckets when reported.
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.categories = {}
+        self.started = time.time()
+
+    def record(self, category, status, seconds, bytes_sent=0, bytes_received=0):
+        with self.lock:
+            entry = self.categories.setdefault(category, {
+                "requests": 0,
+                "statuses": {},
+                "latencies": [],
+                "bytes_sent": 0,
+                "bytes_received": 0
+            })
+            entry["requests"] += 1
+            entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+            entry["latencies"].append(seconds)
+            entry["bytes_sent"] += bytes_sent
+            entry["bytes_received"] += bytes_received
+
+    def snapshot(self):
+        with self.lock:
+            categories = {name: dict(entry, latencies=sorted(entry["latencies"]))
+                          for name, entry in self.categories.items()}
+        report = {}
+        for name, entry in sorted(categories.items(), key=lambda item: -item[1]["requests"]):
+            latencies = entry["latencies"]
+            histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for seconds in latencies:
+                histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if seconds * 1000 <= bound),
+                               len(LATENCY_BUCKETS_MS))] += 1
+            report[name] = {
+                "requests": entry["requests"],
+                "statuses": dict(sorted(entry["statuses"].items())),
+                "total_seconds": sum(latencies),
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+                "latency_histogram_ms": {
+                    **{f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, histogram)},
+                    f">{LATENCY_BUCKETS_MS[-1]}": histogram[-1]
+                },
+                "bytes_sent": entry["bytes_sent"],
+                "bytes_received": entry["bytes_received"]
+            }
+        return report
+
+    def print_summary(self):
+        report = self.snapshot()
+        if not report:
+            return
+        print(f"{'Endpoint':<16}{'Requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'KiB in':>9}{'KiB out':>9}  Statuses")
+        for name, entry in report.items():
+            statuses = ", ".join(f"{status}: {count}" for status, count in entry["statuses"].items())
+            print(f"{name:<16}{entry['requests']:>9}{entry['p50_ms']:>9.0f}{entry['p95_ms']:>9.0f}"
+                  f"{entry['p99_ms']:>9.0f}{entry['bytes_received'] / 1024:>9.0f}{entry['bytes_sent'] / 1024:>9.0f}"
+                  f"  {statuses}")
+        total = sum(entry["requests"] for entry in report.values())
+        print(f"{'Total':<16}{total:>9} requests in {time.time() - self.started:.1f}s")
+
+    # Writes this run's metrics as JSON (one file per run; `run` adds fields such as the operation name)
+    def save(self, path, **run):
+        metrics = dict(run, started_at=self.started, finished_at=time.time(), endpoints=self.snapshot())
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as metrics_file:
+            json.dump(metrics, metrics_file, indent=2)
+        os.replace(tmp_path, path)
+
+
+# Turns a Retry-After or X-RateLimit-Reset header into seconds from now. Servers send delta seconds,
+# epoch seconds, ISO-8601 timestamps or HTTP dates, so accept all of them.
+def seconds_until(header_value):
+    if not header_value:
+        return None
+    value = header_value.strip()
+    try:
+        number = float(value)
+        # Anything this large is an epoch timestamp rather than a delay
+        return max(0.0, number - time.time()) if number > 1e9 else max(0.0, number)
+    except ValueError:
+        pass
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class ConfluenceClient:
+    def __init__(self, cloud, email, api_token, base_url=None, pool_size=10, timeout=DEFAULT_TIMEOUT,
+                 max_requests_per_second=50, max_retries=6, backoff_base=0.5, backoff_cap=30, log=print):
+        self.cloud = cloud
+        self.base_url = (base_url or (CLOUD_BASE_URL if cloud else SERVER_BASE_URL)).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.log = log
+
+        self.rate_limiter = TokenBucket(max_requests_per_second) if max_requests_per_second else None
+        self.concurrency = AdaptiveConcurrencyLimit(max(1, pool_size))
+        self.paused_until = 0.0
+        self.pause_lock = threading.Lock()
+        self.metrics = RequestMetrics()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+        if cloud:
+            self.session.auth = (email, api_token)
+        else:
+            self.session.headers["Authorization"] = f"Bearer {api_token}"
+
+        # Size the pool to the number of worker threads so concurrent calls don't discard connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # path is relative to base_url (e.g. "/rest/api/content"); absolute URLs are passed through
+    def request(self, method, path, **kwargs):
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        category = endpoint_category(method, path, kwargs.get("params"))
+
+        attempt = 0
+        while True:
+            self.wait_for_pause()
+            self.concurrency.acquire()
+            error = None
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                sent = time.perf_counter()
+                response = self.session.request(method, url, **kwargs)
+                self.metrics.record(category, response.status_code, time.perf_counter() - sent,
+                                    len(response.request.body or b""), len(response.content))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.record(category, e.__class__.__name__, time.perf_counter() - sent)
+                # A POST/PUT that timed out may have gone through, so only reads are retried blindly
+                if method != "GET" or attempt >= self.max_retries:
+                    raise
+                error = e
+            finally:
+                self.concurrency.release()
+
+            if error is not None:
+                delay = self.backoff_delay(attempt)
+                self.log(f"{method} {path} failed ({error.__class__.__name__}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self.note_rate_limit_headers(response)
+
+            if response.status_code not in RETRY_STATUSES:
+                self.concurrency.on_success()
+                if self.rate_limiter:
+                    self.rate_limiter.speed_up()
+                return response
+
+            self.concurrency.on_throttled()
+            if self.rate_limiter:
+                self.rate_limiter.slow_down()
+            if attempt >= self.max_retries:
+                return response
+
+            # A server-supplied wait applies to every thread, so pause the whole client;
+            # otherwise only this request backs off
+            server_delay = seconds_until(response.headers.get("Retry-After"))
+            delay = min(server_delay, MAX_PAUSE_SECONDS) if server_delay is not None else self.backoff_delay(attempt)
+            self.log(f"{method} {path} throttled ({response.status_code}); retrying in {delay:.1f}s")
+            if server_delay is not None:
+                self.pause_for(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    # Exponential backoff with full jitter
+    def backoff_delay(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def pause_for(self, seconds):
+        with self.pause_lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_for_pause(self):
+        while True:
+            with self.pause_lock:
+                remaining = self.paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    # Cloud reports its budget on every response; once it's spent, hold everything until the reset
+    def note_rate_limit_headers(self, response):
+        if response.headers.get("X-RateLimit-Remaining", "").strip() != "0":
+            return
+        delay = seconds_until(response.headers.get("X-RateLimit-Reset"))
+        if delay:
+            self.pause_for(min(delay, MAX_PAUSE_SECONDS))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,158 @@
+###############################################################################################################
+#
+#
+# Output formats for export_glossary_to_csv. Every sink receives the same term records from the export
+# pipeline, so one pass over Confluence can write several formats at once:
+# - csv      Term, Definition, Category; the layout bulkTerms_Confluence.py uploads from
+# - jsonl    one JSON object per term with every field below
+# - parquet  typed columns written in row groups, for Power BI refreshes that shouldn't re-infer CSV types
+#            (needs pyarrow, which is only imported when a Parquet export is asked for)
+#
+# A term record is a dict with:
+#   page_id        Confluence page ID (string)
+#   version        page version number, or None if the listing didn't include it
+#   last_modified  ISO 8601 time of that version, or None
+#   term, definition, category
+#   ancestors      page titles from the category parent page down to the term's own parent
+#
+# Sinks write to "<path>.tmp" and only replace <path> on commit(), so a failed export never leaves a
+# half-written file where a good one used to be.
+#
+#
+###############################################################################################################
+
+
+import csv
+import json
+import os
+from datetime import datetime
+
+# Terms per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10000
+
+
+class ExportSink:
+    # Whether the records must carry version and last_modified (the listing then expands version)
+    needs_version = True
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        raise NotImplementedError
+
+    def commit(self):
+        self.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class CsvSink(ExportSink):
+    needs_version = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.tmp_path, mode='w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=["Term", "Definition", "Category"])
+        self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow({"Term": record["term"], "Definition": record["definition"],
+                              "Category": record["category"]})
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesSink(ExportSink):
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.tmp_path, mode='w', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink(ExportSink):
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow; install it with 'pip install pyarrow'.")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("page_id", pa.int64()),
+            ("version", pa.int32()),
+            ("last_modified", pa.timestamp("ms", tz="UTC")),
+            ("term", pa.string()),
+            ("definition", pa.string()),
+            ("category", pa.string()),
+            ("ancestors", pa.list_(pa.string()))
+        ])
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        self.row_group_size = row_group_size
+        self.columns = {name: [] for name in self.schema.names}
+
+    def write(self, record):
+        self.columns["page_id"].append(int(record["page_id"]))
+        self.columns["version"].append(record["version"])
+        self.columns["last_modified"].append(parse_timestamp(record["last_modified"]))
+        for name in ("term", "definition", "category", "ancestors"):
+            self.columns[name].append(record[name])
+        if len(self.columns["page_id"]) >= self.row_group_size:
+            self.write_row_group()
+
+    def write_row_group(self):
+        if not self.columns["page_id"]:
+            return
+        self.writer.write_table(self.pa.Table.from_pydict(self.columns, schema=self.schema))
+        self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        if self.writer is None:
+            return
+        try:
+            self.write_row_group()
+        finally:
+            self.writer.close()
+            self.writer = None
+
+
+# "2024-05-02T14:03:11.000Z" -> aware datetime; None stays None
+def parse_timestamp(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonLinesSink, "parquet": ParquetSink}
+
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+
+# Export format implied by a file name, or None if the extension isn't one of ours
+def format_for_path(path):
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def open_sink(export_format, path):
+    if export_format not in SINKS:
+        raise ValueError(f"Unknown export format '{export_format}'; use one of {', '.join(SINKS)}.")
+    return SINKS[export_format](path)
@@ -0,0 +1,326 @@
+###############################################################################################################
+#
+#
+# Command-line entry point for bulkTerms_Confluence.py, for scheduled runs on a build agent.
+# Credentials come from the same environment variables ui.py sets:
+#   GLOSSARY_CLOUD   "True" for Confluence Cloud (default), "False" for Server
+#   GLOSSARY_EMAIL   account email (Cloud only)
+#   GLOSSARY_TOKEN   API token (Cloud) or PAT (Server)
+#   GLOSSARY_CSV     default CSV for `upload`
+#
+# Examples:
+#   python glossary_cli.py verify
+#   python glossary_cli.py validate terms.csv
+#   python glossary_cli.py upload terms.csv --concurrency 8 --cache-dir .glossary-cache --resume
+#   python glossary_cli.py --json export glossary.csv --page-size 200 --cache-dir .glossary-cache
+#   python glossary_cli.py export glossary.csv --index glossary_index.db
+#   python glossary_cli.py export out/glossary --format csv,jsonl,parquet   (glossary.csv, .jsonl and .parquet)
+#   python glossary_cli.py search "assessed value" --index glossary_index.db
+#
+# `validate` and `search` work offline and need no credentials: `validate` runs the upload's pre-flight CSV
+# check on its own, `search` reads the offline index kept up to date by `export --index`.
+#
+# With --json the run's log goes to stderr and stdout holds a single JSON summary, e.g.
+#   {"command": "export", "ok": true, "exit_code": 0, "seconds": 12.3, "written": 1843, ...}
+#
+# Exit codes:
+#   0  success
+#   1  finished, but some rows failed, collided or were left without labels; or the CSV failed the
+#      pre-flight check (nothing is uploaded unless --allow-invalid-rows, and then the rows it rejected
+#      still count as failures)
+#   2  bad arguments or missing credentials
+#   3  connection check failed, or the run stopped with an error
+#   130  cancelled with Ctrl+C (uploads stop cleanly and can be continued with --resume)
+#
+#
+###############################################################################################################
+
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from bulkTerms_Confluence import (
+    OperationCancelled,
+    category_mapping,
+    count_upload_statuses,
+    export_glossary_to_csv,
+    main,
+    verify_rest_connection
+)
+from export_sinks import SINKS
+from glossary_index import DEFAULT_INDEX_PATH, GlossaryIndex
+from upload_preflight import PreflightError, validate_upload_csv
+
+EXIT_OK = 0
+EXIT_ROW_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+EXIT_CANCELLED = 130
+
+EXPORT_FORMATS = tuple(SINKS)
+
+
+# Bad arguments or environment, reported with EXIT_USAGE
+class UsageError(Exception):
+    pass
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def credentials(args):
+    cloud = env_flag("GLOSSARY_CLOUD", True) if args.cloud is None else args.cloud
+    email = os.environ.get("GLOSSARY_EMAIL") or None
+    token = os.environ.get("GLOSSARY_TOKEN") or ""
+    if not token or (cloud and not email):
+        needed = "GLOSSARY_EMAIL and GLOSSARY_TOKEN" if cloud else "GLOSSARY_TOKEN"
+        raise UsageError(f"Set {needed} in the environment for a {'Cloud' if cloud else 'Server'} connection.")
+    return cloud, email, token
+
+
+def cache_file(args, name):
+    if not args.cache_dir:
+        return None
+    os.makedirs(args.cache_dir, exist_ok=True)
+    return os.path.join(args.cache_dir, name)
+
+
+# Runs work(cancel_event) on a worker thread so Ctrl+C can ask it to stop cleanly instead of killing it
+# halfway through a request. A second Ctrl+C gives up waiting.
+def run_cancellable(work):
+    cancel_event = threading.Event()
+    outcome = {}
+
+    def worker():
+        try:
+            outcome["result"] = work(cancel_event)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        print("Cancelling; waiting for requests in progress (Ctrl+C again to quit now)...", file=sys.stderr)
+        cancel_event.set()
+        thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result"), cancel_event.is_set()
+
+
+def run_verify(args, cloud, email, token):
+    ok = verify_rest_connection(cloud, email, token, base_url=args.base_url)
+    print("Connection successful!" if ok else "Connection failed. Check your credentials and try again.")
+    return (EXIT_OK if ok else EXIT_ERROR), {}
+
+
+def csv_argument(args):
+    csv_path = args.csv or os.environ.get("GLOSSARY_CSV")
+    if not csv_path:
+        raise UsageError(f"Give the CSV to {args.command}, or set GLOSSARY_CSV.")
+    if not os.path.exists(csv_path):
+        raise UsageError(f"CSV not found: {csv_path}")
+    return csv_path
+
+
+def preflight_summary(report):
+    return {"rows": len(report.rows), "valid": len(report.valid_rows), "errors": report.errors,
+            "warnings": report.warnings}
+
+
+def run_validate(args, cloud, email, token):
+    csv_path = csv_argument(args)
+    report = validate_upload_csv(csv_path, category_mapping)
+    for line in report.lines():
+        print(line)
+    return (EXIT_OK if report.ok else EXIT_ROW_FAILURES), {"csv": csv_path, "preflight": preflight_summary(report)}
+
+
+def run_upload(args, cloud, email, token):
+    csv_path = csv_argument(args)
+
+    # The upload checks the CSV again and prints the problems; this copy of the report is for the summary,
+    # so rows --allow-invalid-rows left out still show in the exit code
+    preflight = validate_upload_csv(csv_path, category_mapping)
+
+    journal_path = cache_file(args, f"{os.path.basename(csv_path)}.journal.db")
+    try:
+        rows, was_cancelled = run_cancellable(lambda cancel_event: main(
+            cloud, email, token, csv_path,
+            parent_id_cache=cache_file(args, "parent_ids.json"),
+            max_in_flight=args.concurrency,
+            check_existing=not args.no_check_existing,
+            upsert=args.upsert,
+            journal=not args.no_journal,
+            journal_path=journal_path,
+            resume=args.resume,
+            base_url=args.base_url,
+            max_requests_per_second=args.rate or None,
+            metrics_path=args.metrics,
+            cancel_event=cancel_event,
+            allow_invalid_rows=args.allow_invalid_rows
+        ))
+    except PreflightError as e:
+        print(f"Error: {e}")
+        return EXIT_ROW_FAILURES, {"csv": csv_path, "preflight": preflight_summary(e.report)}
+
+    counts = count_upload_statuses(rows)
+    if was_cancelled:
+        exit_code = EXIT_CANCELLED
+    elif counts["failed"] or counts["collided"] or counts["unlabeled"] or preflight.errors:
+        exit_code = EXIT_ROW_FAILURES
+    else:
+        exit_code = EXIT_OK
+    return exit_code, {"csv": csv_path, "counts": counts, "preflight": preflight_summary(preflight)}
+
+
+# [(format, path)] for `export`: one format writes to the output as given, several write one file each
+# next to it, named after the output with the format's extension
+def export_outputs(output, formats):
+    formats = [name.strip().lower() for name in formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in EXPORT_FORMATS]
+    if unknown or not formats:
+        raise UsageError(f"Unknown export format '{','.join(unknown)}'; use one or more of "
+                         f"{', '.join(EXPORT_FORMATS)}.")
+    if len(formats) == 1:
+        return [(formats[0], output)]
+    stem = os.path.splitext(output)[0]
+    return [(name, f"{stem}.{name}") for name in dict.fromkeys(formats)]
+
+
+def run_export(args, cloud, email, token):
+    outputs = export_outputs(args.output, args.format)
+    try:
+        written, _ = run_cancellable(lambda cancel_event: export_glossary_to_csv(
+            cloud, email, token, None,
+            max_workers=args.concurrency,
+            page_size=args.page_size,
+            expand_bodies=not args.no_expand_bodies,
+            body_cache_path=cache_file(args, "page_bodies.json"),
+            base_url=args.base_url,
+            max_requests_per_second=args.rate or None,
+            metrics_path=args.metrics,
+            cancel_event=cancel_event,
+            max_depth=args.max_depth,
+            source=args.source,
+            index_path=args.index,
+            outputs=outputs
+        ))
+    except OperationCancelled:
+        return EXIT_CANCELLED, {"outputs": dict(outputs), "written": None}
+    return EXIT_OK, {"outputs": dict(outputs), "written": written}
+
+
+def run_search(args, cloud, email, token):
+    if not os.path.exists(args.index):
+        raise UsageError(f"No offline index at {args.index}; run `export --index {args.index}` first.")
+    with GlossaryIndex(args.index, read_only=True) as index:
+        matches = index.search(args.query, args.limit)
+    for match in matches:
+        print(f"{match['term']}  [{match['category']}]")
+        print(f"    {match['snippet']}")
+    if not matches:
+        print(f"No terms match '{args.query}'.")
+    return EXIT_OK, {"query": args.query, "matches": matches}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Upload and export Confluence glossary terms.")
+    connection = parser.add_mutually_exclusive_group()
+    connection.add_argument("--cloud", dest="cloud", action="store_true", default=None,
+                            help="connect to Confluence Cloud (default: GLOSSARY_CLOUD, else Cloud)")
+    connection.add_argument("--server", dest="cloud", action="store_false", help="connect to Confluence Server")
+    parser.add_argument("--base-url", help="override the Confluence base URL (e.g. a mock_confluence.py server)")
+    parser.add_argument("--rate", type=float, default=50, help="max requests per second, 0 for unlimited")
+    parser.add_argument("--metrics", help="write per-endpoint request metrics to this JSON file")
+    parser.add_argument("--json", action="store_true",
+                        help="print a JSON summary on stdout and send the log to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("verify", help="check that the credentials can reach the REST API")
+
+    validate = commands.add_parser("validate", help="check an upload CSV without connecting")
+    validate.add_argument("csv", nargs="?", help="CSV to check (default: GLOSSARY_CSV)")
+
+    upload = commands.add_parser("upload", help="create glossary pages from a CSV (Term, Definition, Category)")
+    upload.add_argument("csv", nargs="?", help="CSV to upload (default: GLOSSARY_CSV)")
+    upload.add_argument("--concurrency", type=int, default=8, help="rows uploaded at once")
+    upload.add_argument("--cache-dir", help="folder for the parent page ID cache and the upload journal")
+    upload.add_argument("--upsert", action="store_true", help="also update existing terms whose definition changed")
+    upload.add_argument("--no-check-existing", action="store_true",
+                        help="skip the scan of existing titles before uploading")
+    upload.add_argument("--resume", action="store_true", help="continue an interrupted upload of the same CSV")
+    upload.add_argument("--no-journal", action="store_true", help="don't keep an upload journal")
+    upload.add_argument("--allow-invalid-rows", action="store_true",
+                        help="upload the valid rows even if the pre-flight check found errors")
+
+    export = commands.add_parser("export", help="write every glossary term to a file")
+    export.add_argument("output", help="file to write (with several formats, the name the files share)")
+    export.add_argument("--format", default="csv",
+                        help=f"comma-separated output formats, written in one pass: {', '.join(EXPORT_FORMATS)}")
+    export.add_argument("--concurrency", type=int, default=8, help="page bodies fetched at once")
+    export.add_argument("--page-size", type=int, default=200, help="results per listing request")
+    export.add_argument("--cache-dir", help="folder for the page body cache (only changed pages are fetched)")
+    export.add_argument("--source", choices=("tree", "label"), default="tree",
+                        help="find terms by crawling the category pages, or with one CQL search for the glossary label")
+    export.add_argument("--max-depth", type=int, default=10,
+                        help="levels of sub-pages to crawl under each category (1 = direct children only)")
+    export.add_argument("--no-expand-bodies", action="store_true",
+                        help="fetch each body separately instead of inline with the listing")
+    export.add_argument("--index", help="also keep this offline search index up to date (see `search`)")
+
+    search = commands.add_parser("search", help="look terms up in the offline index, without connecting")
+    search.add_argument("query", help="words to look for in term, definition and category")
+    search.add_argument("--index", default=DEFAULT_INDEX_PATH, help="index written by `export --index`")
+    search.add_argument("--limit", type=int, default=20, help="most matches to show")
+    return parser
+
+
+COMMANDS = {"verify": run_verify, "validate": run_validate, "upload": run_upload, "export": run_export,
+            "search": run_search}
+
+# Commands that never talk to Confluence, so don't need credentials
+OFFLINE_COMMANDS = {"validate", "search"}
+
+
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.monotonic()
+    summary = {"command": args.command}
+
+    # With --json, stdout is reserved for the summary
+    log_stream = sys.stderr if args.json else sys.stdout
+    with contextlib.redirect_stdout(log_stream):
+        try:
+            cloud, email, token = (None, None, None) if args.command in OFFLINE_COMMANDS else credentials(args)
+            exit_code, details = COMMANDS[args.command](args, cloud, email, token)
+            summary.update(details)
+        except UsageError as e:
+            print(f"Error: {e}")
+            exit_code = EXIT_USAGE
+            summary["error"] = str(e)
+        except Exception as e:
+            print(f"Error during {args.command}: {e}")
+            exit_code = EXIT_ERROR
+            summary["error"] = f"{e.__class__.__name__}: {e}"
+
+    summary.update(ok=exit_code == EXIT_OK, exit_code=exit_code, seconds=round(time.monotonic() - started, 3))
+    if args.json:
+        print(json.dumps(summary))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(run())
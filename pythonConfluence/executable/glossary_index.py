@@ -0,0 +1,166 @@
+###############################################################################################################
+#
+#
+# Offline copy of the glossary in a local SQLite database with an FTS5 full-text index over term,
+# definition and category, so "what does X mean" is answered in milliseconds without Confluence.
+#
+# export_glossary_to_csv(..., index_path=...) keeps it up to date. Pages whose version hasn't changed since
+# the last export are neither fetched nor rewritten; changed pages are updated, deleted pages removed.
+# ui.py's search box and `glossary_cli.py search` query it through search_glossary().
+#
+#
+###############################################################################################################
+
+
+import os
+import re
+import sqlite3
+import time
+from urllib.request import pathname2url
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".confluence_glossary", "glossary_index.db")
+
+# bm25 column weights: a hit in the term counts most, then the category, then the definition
+RANK_WEIGHTS = (10.0, 1.0, 2.0)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS terms (
+        rowid INTEGER PRIMARY KEY,
+        page_id TEXT NOT NULL UNIQUE,
+        version INTEGER,
+        term TEXT NOT NULL,
+        definition TEXT NOT NULL,
+        category TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+        term, definition, category,
+        content='terms', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+    );
+    CREATE TRIGGER IF NOT EXISTS terms_ai AFTER INSERT ON terms BEGIN
+        INSERT INTO terms_fts(rowid, term, definition, category)
+        VALUES (new.rowid, new.term, new.definition, new.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS terms_ad AFTER DELETE ON terms BEGIN
+        INSERT INTO terms_fts(terms_fts, rowid, term, definition, category)
+        VALUES ('delete', old.rowid, old.term, old.definition, old.category);
+    END;
+    CREATE TRIGGER IF NOT EXISTS terms_au AFTER UPDATE ON terms BEGIN
+        INSERT INTO terms_fts(terms_fts, rowid, term, definition, category)
+        VALUES ('delete', old.rowid, old.term, old.definition, old.category);
+        INSERT INTO terms_fts(rowid, term, definition, category)
+        VALUES (new.rowid, new.term, new.definition, new.category);
+    END;
+"""
+
+
+# Turns what someone typed into an FTS5 query: every word must match, and the last one may be a prefix
+# ("assess val" finds "Assessed Value"). Quoting each word keeps FTS5 syntax characters harmless.
+def fts_query(text):
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+# read_only opens an existing index for searching only: no schema script and no write lock. The index is
+# in WAL mode, so a search reads the last committed state while an export is syncing instead of waiting.
+class GlossaryIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH, read_only=False):
+        self.path = path
+        if read_only:
+            self.connection = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True,
+                                              timeout=1)
+            return
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        try:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            self.connection.close()
+            if "fts5" not in str(e):
+                raise
+            raise RuntimeError(f"This Python's SQLite has no FTS5 support, so the offline index is unavailable: {e}")
+
+    # {page_id: {"version", "term", "definition", "category"}} for every indexed page
+    def entries(self):
+        return {
+            page_id: {"version": version, "term": term, "definition": definition, "category": category}
+            for page_id, version, term, definition, category in self.connection.execute(
+                "SELECT page_id, version, term, definition, category FROM terms")
+        }
+
+    # Brings the index in line with one export: `rows` is [(page_id, version, term, definition, category)]
+    # for every current page. Unchanged rows are left alone and pages not in `rows` are removed, all in one
+    # transaction so a failed export never leaves the index half updated.
+    def sync(self, rows):
+        known = {page_id: (version, term, definition, category)
+                 for page_id, (version, term, definition, category) in (
+                     (entry[0], entry[1:]) for entry in self.connection.execute(
+                         "SELECT page_id, version, term, definition, category FROM terms"))}
+        now = time.time()
+        added = updated = 0
+        seen = set()
+        with self.connection:
+            for page_id, version, term, definition, category in rows:
+                seen.add(page_id)
+                current = known.get(page_id)
+                if current == (version, term, definition, category):
+                    continue
+                if current is None:
+                    added += 1
+                    self.connection.execute(
+                        "INSERT INTO terms (page_id, version, term, definition, category, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", (page_id, version, term, definition, category, now))
+                else:
+                    updated += 1
+                    self.connection.execute(
+                        "UPDATE terms SET version = ?, term = ?, definition = ?, category = ?, updated_at = ? "
+                        "WHERE page_id = ?", (version, term, definition, category, now, page_id))
+            removed = [page_id for page_id in known if page_id not in seen]
+            self.connection.executemany("DELETE FROM terms WHERE page_id = ?", ((page_id,) for page_id in removed))
+        return added, updated, len(removed)
+
+    # Best matches first: [{"term", "definition", "category", "page_id", "snippet", "score"}]
+    def search(self, text, limit=20):
+        query = fts_query(text)
+        if query is None:
+            return []
+        cursor = self.connection.execute(
+            f"""SELECT t.term, t.definition, t.category, t.page_id,
+                       snippet(terms_fts, 1, '[', ']', '...', 16),
+                       bm25(terms_fts, {RANK_WEIGHTS[0]}, {RANK_WEIGHTS[1]}, {RANK_WEIGHTS[2]}) AS score
+                FROM terms_fts JOIN terms t ON t.rowid = terms_fts.rowid
+                WHERE terms_fts MATCH ?
+                ORDER BY score
+                LIMIT ?""",
+            (query, limit))
+        return [
+            {"term": term, "definition": definition, "category": category, "page_id": page_id,
+             "snippet": snippet, "score": score}
+            for term, definition, category, page_id, snippet, score in cursor
+        ]
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# One-off lookup for callers that don't keep the index open. Returns [] when there is no index yet.
+def search_glossary(text, limit=20, index_path=DEFAULT_INDEX_PATH):
+    if not os.path.exists(index_path):
+        return []
+    with GlossaryIndex(index_path, read_only=True) as index:
+        return index.search(text, limit)
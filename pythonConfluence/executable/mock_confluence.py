@@ -0,0 +1,377 @@
+###############################################################################################################
+#
+#
+# Local stand-in for the Confluence REST endpoints used by bulkTerms_Confluence.py, for benchmarks and
+# dry runs that must not touch the real site:
+# - GET  /rest/api/user/current
+# - GET  /rest/api/content                    (title / spaceKey / type filters, paginated)
+# - POST /rest/api/content                    (create, including metadata.labels)
+# - GET  /rest/api/content/{id}               (expand body.storage, version, ancestors, metadata.labels,
+#                                               children.page)
+# - PUT  /rest/api/content/{id}               (update; a stale version number gets a 409)
+# - GET  /rest/api/content/{id}/child/page    (paginated)
+# - GET  /rest/api/content/search             (CQL: label / space / type clauses joined by "and";
+#                                               cursor-paginated like Cloud)
+# - POST /rest/api/content/{id}/label
+# Pages live in memory only. The space starts with one parent page per glossary category.
+#
+# Knobs for making it behave like a busy server:
+# --latency / --jitter       seconds added to every response
+# --max-limit                page-size cap for listings (--max-expanded-limit when body.storage is expanded)
+# --throttle-rate            share of requests answered 429 (with Retry-After: --retry-after)
+# --error-rate               share of requests answered --error-status (503 by default)
+#
+# GET /__stats returns request counts per endpoint and status; POST /__reset clears them.
+#
+# To run: python mock_confluence.py [--port 8090] [--latency 0.02] [--throttle-rate 0.01]
+# then point the scripts at it with base_url="http://127.0.0.1:8090" (Cloud or Server mode both work).
+#
+#
+###############################################################################################################
+
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PARENT_TITLES = ("Enterprise Assessment", "Enterprise Property Tax", "Enterprise Tools",
+                         "Common Rolltypes", "General Terms")
+
+
+# Confluence's version.when format, e.g. 2024-05-02T14:03:11.000Z
+def timestamp():
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+
+
+class MockConfluence:
+    def __init__(self, space_key="iassupport", parent_titles=DEFAULT_PARENT_TITLES, latency=0.0, jitter=0.0,
+                 max_limit=200, max_expanded_limit=None, throttle_rate=0.0, retry_after=0, error_rate=0.0,
+                 error_status=503, seed=None):
+        self.space_key = space_key
+        self.latency = latency
+        self.jitter = jitter
+        self.max_limit = max_limit
+        self.max_expanded_limit = max_expanded_limit or max_limit
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.titles = {}
+        self.children = {}
+        self.next_id = 100000
+        self.stats = Counter()
+        self.server = None
+        self.thread = None
+
+        for title in parent_titles:
+            self.add_page(title, None, "<p>Glossary category</p>")
+
+    # ---------- page store ----------
+    def add_page(self, title, parent_id, body, labels=()):
+        with self.lock:
+            page_id = str(self.next_id)
+            self.next_id += 1
+            self.pages[page_id] = {
+                "id": page_id,
+                "title": title,
+                "parent_id": parent_id,
+                "body": body,
+                "version": 1,
+                "when": timestamp(),
+                "labels": list(labels)
+            }
+            self.titles[title.casefold()] = page_id
+            self.children.setdefault(parent_id, []).append(page_id)
+            return page_id
+
+    def ancestors(self, page):
+        chain = []
+        parent_id = page["parent_id"]
+        while parent_id is not None:
+            parent = self.pages[parent_id]
+            chain.append({"id": parent["id"], "type": "page", "title": parent["title"]})
+            parent_id = parent["parent_id"]
+        return list(reversed(chain))
+
+    def view(self, page, expand):
+        fields = set(expand.split(",")) if expand else set()
+        result = {
+            "id": page["id"],
+            "type": "page",
+            "status": "current",
+            "title": page["title"],
+            "_links": {"webui": f"/spaces/{self.space_key}/pages/{page['id']}"}
+        }
+        if "body.storage" in fields:
+            result["body"] = {"storage": {"value": page["body"], "representation": "storage"}}
+        if "version" in fields:
+            result["version"] = {"number": page["version"], "when": page["when"]}
+        if "ancestors" in fields:
+            result["ancestors"] = self.ancestors(page)
+        if "children.page" in fields:
+            child_ids = self.children.get(page["id"], [])
+            result["children"] = {"page": {
+                "results": [self.view(self.pages[child_id], None) for child_id in child_ids[:25]],
+                "start": 0,
+                "limit": 25,
+                "size": min(25, len(child_ids))
+            }}
+        if "metadata.labels" in fields:
+            result["metadata"] = {"labels": {"results": [{"prefix": "global", "name": name}
+                                                         for name in page["labels"]]}}
+        return result
+
+    def listing(self, path, pages, query, cursor=False):
+        expand = query.get("expand")
+        cap = self.max_expanded_limit if expand and "body.storage" in expand else self.max_limit
+        start = int(query.get("cursor", 0) if cursor else query.get("start", 0))
+        limit = int(query.get("limit", 25))
+        if limit > cap:
+            # Like Confluence, refuse oversized expanded pages rather than silently trimming them
+            if expand and "body.storage" in expand:
+                return 400, {"statusCode": 400, "message": f"limit {limit} too large for expand={expand}"}
+            limit = cap
+        batch = pages[start:start + limit]
+        result = {
+            "results": [self.view(page, expand) for page in batch],
+            "start": start,
+            "limit": limit,
+            "size": len(batch),
+            "_links": {}
+        }
+        if start + len(batch) < len(pages):
+            position = f"cursor={start + len(batch)}" if cursor else f"start={start + len(batch)}"
+            result["_links"]["next"] = f"{path}?{position}&limit={limit}"
+        return 200, result
+
+    # Only the CQL the scripts send: clauses like label = "x", space = "y", type = page joined by "and"
+    def search(self, path, query):
+        clauses = re.findall(r'(\w+)\s*=\s*"?([^"\s]+)"?', query.get("cql", ""))
+        if not clauses:
+            return 400, {"statusCode": 400, "message": "Could not parse cql"}
+        with self.lock:
+            pages = list(self.pages.values())
+        for field, value in clauses:
+            if field == "label":
+                pages = [page for page in pages if value in page["labels"]]
+            elif field == "space":
+                pages = pages if value == self.space_key else []
+            elif field != "type" or value != "page":
+                return 400, {"statusCode": 400, "message": f"Unsupported cql field '{field}'"}
+        return self.listing(path, pages, query, cursor=True)
+
+    # ---------- request routing ----------
+    def handle(self, method, path, query, payload):
+        parts = path.split("/rest/api/", 1)[1].strip("/").split("/") if "/rest/api/" in path else []
+
+        if parts == ["user", "current"] and method == "GET":
+            return "user/current", 200, {"type": "known", "username": "mock", "displayName": "Mock User"}
+
+        if parts == ["content"] and method == "GET":
+            with self.lock:
+                if "title" in query:
+                    page = self.pages.get(self.titles.get(query["title"].casefold()))
+                    pages = [page] if page is not None and page["title"] == query["title"] else []
+                else:
+                    pages = list(self.pages.values())
+            return "content", *self.listing(path, pages, query)
+
+        if parts == ["content", "search"] and method == "GET":
+            return "content/search", *self.search(path, query)
+
+        if parts == ["content"] and method == "POST":
+            return "content (create)", *self.create(payload)
+
+        if len(parts) == 2 and parts[0] == "content":
+            page = self.pages.get(parts[1])
+            if page is None:
+                return "content/{id}", 404, {"statusCode": 404, "message": "No content found"}
+            if method == "GET":
+                return "content/{id}", 200, self.view(page, query.get("expand"))
+            if method == "PUT":
+                return "content/{id} (update)", *self.update(page, payload)
+
+        if len(parts) == 4 and parts[0] == "content" and parts[2:] == ["child", "page"] and method == "GET":
+            with self.lock:
+                pages = [self.pages[child_id] for child_id in self.children.get(parts[1], [])]
+            return "content/{id}/child/page", *self.listing(path, pages, query)
+
+        if len(parts) == 3 and parts[0] == "content" and parts[2] == "label" and method == "POST":
+            page = self.pages.get(parts[1])
+            if page is None:
+                return "content/{id}/label", 404, {"statusCode": 404, "message": "No content found"}
+            with self.lock:
+                for label in payload or []:
+                    if label["name"] not in page["labels"]:
+                        page["labels"].append(label["name"])
+            return "content/{id}/label", 200, {"results": [{"prefix": "global", "name": name}
+                                                           for name in page["labels"]]}
+
+        return "unknown", 404, {"statusCode": 404, "message": f"No mock for {method} {path}"}
+
+    def create(self, payload):
+        title = payload.get("title", "")
+        ancestors = payload.get("ancestors") or [{}]
+        parent_id = ancestors[-1].get("id")
+        if not title:
+            return 400, {"statusCode": 400, "message": "A page must have a title"}
+        if parent_id is not None and parent_id not in self.pages:
+            return 400, {"statusCode": 400, "message": f"Parent page {parent_id} does not exist"}
+        with self.lock:
+            if title.casefold() in self.titles:
+                return 400, {"statusCode": 400,
+                             "message": "A page with this title already exists: A page already exists "
+                                        "with the same TITLE in this space"}
+        labels = [label["name"] for label in payload.get("metadata", {}).get("labels", [])]
+        page_id = self.add_page(title, parent_id, payload["body"]["storage"]["value"], labels)
+        return 200, self.view(self.pages[page_id], "version,ancestors")
+
+    def update(self, page, payload):
+        with self.lock:
+            if payload.get("version", {}).get("number") != page["version"] + 1:
+                return 409, {"statusCode": 409, "message": "Version must be incremented on update"}
+            page["version"] += 1
+            page["when"] = timestamp()
+            page["body"] = payload["body"]["storage"]["value"]
+            if payload.get("ancestors") and payload["ancestors"][-1]["id"] != page["parent_id"]:
+                self.children[page["parent_id"]].remove(page["id"])
+                page["parent_id"] = payload["ancestors"][-1]["id"]
+                self.children.setdefault(page["parent_id"], []).append(page["id"])
+            if payload.get("title"):
+                del self.titles[page["title"].casefold()]
+                page["title"] = payload["title"]
+                self.titles[page["title"].casefold()] = page["id"]
+        return 200, self.view(page, "version")
+
+    # Latency, throttling and injected errors, decided before the request is routed
+    def injected_failure(self):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            return self.error_status, {}
+        return None
+
+    # ---------- server ----------
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), make_handler(self))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so clients can keep connections alive, as they would against the real site
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def dispatch(self, method):
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if url.path == "/__stats":
+                with mock.lock:
+                    stats = {"requests": sum(mock.stats.values()), "pages": len(mock.pages),
+                             "by_endpoint": {f"{key[0]} {key[1]} {key[2]}": count
+                                             for key, count in sorted(mock.stats.items())}}
+                return self.send_json(200, stats)
+            if url.path == "/__reset":
+                with mock.lock:
+                    mock.stats.clear()
+                return self.send_json(200, {})
+
+            try:
+                payload = json.loads(raw) if raw else None
+            except ValueError:
+                payload = None
+            endpoint = re.sub(r"/\d+", "/{id}", url.path.split("/rest/api", 1)[-1]) or url.path
+
+            failure = mock.injected_failure()
+            if failure:
+                status, headers = failure
+                body = {"statusCode": status, "message": "Injected failure"}
+            else:
+                endpoint, status, body = mock.handle(method, url.path, query, payload)
+                headers = {}
+            with mock.lock:
+                mock.stats[(method, endpoint, status)] += 1
+            self.send_json(status, body, headers)
+
+        def do_GET(self):
+            self.dispatch("GET")
+
+        def do_POST(self):
+            self.dispatch("POST")
+
+        def do_PUT(self):
+            self.dispatch("PUT")
+
+    return Handler
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run a local mock of the Confluence REST API.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8090, help="0 picks a free port")
+    arg_parser.add_argument("--space-key", default="iassupport")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    arg_parser.add_argument("--max-limit", type=int, default=200, help="largest page size served")
+    arg_parser.add_argument("--max-expanded-limit", type=int, help="largest page size with body.storage expanded")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    arg_parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with a 429")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered --error-status")
+    arg_parser.add_argument("--error-status", type=int, default=503)
+    arg_parser.add_argument("--seed", type=int)
+    args = arg_parser.parse_args()
+
+    mock = MockConfluence(args.space_key, latency=args.latency, jitter=args.jitter, max_limit=args.max_limit,
+                          max_expanded_limit=args.max_expanded_limit, throttle_rate=args.throttle_rate,
+                          retry_after=args.retry_after, error_rate=args.error_rate,
+                          error_status=args.error_status, seed=args.seed)
+    print(f"Mock Confluence listening on {mock.start(args.host, args.port)}", flush=True)
+    try:
+        mock.thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
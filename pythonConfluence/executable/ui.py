@@ -1,17 +1,23 @@
 from bulkTerms_Confluence import (
     verify_rest_connection,
     main,
-    export_glossary_to_csv
+    export_glossary_to_csv,
+    count_upload_statuses
 )
+from export_sinks import format_for_path
+from glossary_index import DEFAULT_INDEX_PATH, search_glossary
+from upload_preflight import PreflightError
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import subprocess
 import os
+import queue
+import sqlite3
 import threading
+import time
 import tkinter.scrolledtext as scrolledtext
-import sys
-from io import StringIO
+import tkinter.ttk as ttk
 
 
 # ----- UI Styling -----
@@ -22,6 +28,9 @@ ENTRY_BG = "#F0F0F0"
 BUTTON_BG = "#362499"
 BUTTON_FG = "white"
 
+# How often (ms) the main loop drains progress events from a running upload/export
+POLL_MS = 100
+
 
 # ----- Functions -----
 def toggle_cloud_inputs():
@@ -59,6 +68,113 @@ def test_connection():
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {e}")
 
+# Runs work(on_event, cancel_event) on a worker thread and shows its progress in a new window.
+# The worker only puts events on a queue; the window drains it from the Tk main loop with after(), so
+# widgets are only ever touched from the main thread. on_done(result, error, was_cancelled) runs on the
+# main thread once the worker returns or raises.
+def run_with_progress(title, unit, work, on_done):
+    events = queue.Queue()
+    cancel_event = threading.Event()
+    state = {"total": None, "done": 0, "started": time.monotonic(), "running": True}
+
+    progress_win = tk.Toplevel(root)
+    progress_win.title(title)
+    progress_bar = ttk.Progressbar(progress_win, mode="indeterminate", length=400)
+    progress_bar.pack(fill=tk.X, padx=10, pady=(10, 0))
+    status_label = tk.Label(progress_win, text="Starting...", font=FONT, anchor="w")
+    status_label.pack(fill=tk.X, padx=10)
+    output_text = scrolledtext.ScrolledText(progress_win, width=80, height=20)
+    output_text.pack(fill=tk.BOTH, expand=True)
+
+    def cancel():
+        cancel_event.set()
+        cancel_btn.config(state="disabled", text="Cancelling...")
+
+    cancel_btn = tk.Button(progress_win, text="Cancel", command=cancel, font=FONT, bg=BUTTON_BG, fg=BUTTON_FG)
+    cancel_btn.pack(pady=5)
+
+    # Closing the window mid-run cancels first; it closes for real once the worker has stopped
+    def close():
+        if state["running"]:
+            cancel()
+        else:
+            progress_win.destroy()
+
+    progress_win.protocol("WM_DELETE_WINDOW", close)
+
+    def log(message):
+        output_text.insert(tk.END, f"{message}\n")
+        output_text.see(tk.END)
+
+    def show_status():
+        elapsed = time.monotonic() - state["started"]
+        rate = state["done"] / elapsed if elapsed > 0 else 0
+        if state["total"] is None:
+            text = f"{state['done']} {unit}"
+        else:
+            text = f"{state['done']} / {state['total']} {unit}"
+        text += f"  ·  {rate:.1f} {unit}/s"
+        if state["total"] and rate > 0:
+            remaining = (state["total"] - state["done"]) / rate
+            text += f"  ·  ETA {int(remaining // 60)}:{int(remaining % 60):02d}"
+        status_label.config(text=text)
+
+    # Returns True once the worker is done
+    def handle(event):
+        if event["type"] == "log":
+            log(event["message"])
+        elif event["type"] == "start":
+            state.update(total=event["total"], done=0, started=time.monotonic())
+            if event["total"] is None:
+                progress_bar.config(mode="indeterminate")
+                progress_bar.start(50)
+            else:
+                progress_bar.config(mode="determinate", maximum=max(1, event["total"]), value=0)
+        elif event["type"] == "progress":
+            state["done"] = event["done"]
+            for message in event.get("messages", ()):
+                log(message)
+            if state["total"] is not None:
+                progress_bar.config(value=event["done"])
+        elif event["type"] == "done":
+            state["running"] = False
+            progress_bar.stop()
+            progress_bar.config(mode="determinate", maximum=max(1, state["total"] or state["done"]),
+                                value=state["done"])
+            cancel_btn.config(state="disabled")
+            if event["error"] is not None and not cancel_event.is_set():
+                log(f"Error: {event['error']}")
+            on_done(event["result"], event["error"], cancel_event.is_set())
+            return True
+        return False
+
+    def drain():
+        try:
+            # Bounded per tick so a burst of events can't freeze the window
+            for _ in range(500):
+                if handle(events.get_nowait()):
+                    show_status()
+                    return
+        except queue.Empty:
+            pass
+        show_status()
+        root.after(POLL_MS, drain)
+
+    def worker():
+        try:
+            result = work(events.put, cancel_event)
+            events.put({"type": "done", "result": result, "error": None})
+        except Exception as e:
+            events.put({"type": "done", "result": None, "error": e})
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(POLL_MS, drain)
+
+def set_buttons_state(state):
+    upload_btn.config(state=state)
+    test_btn.config(state=state)
+    export_btn.config(state=state)
+
 def run_upload_and_show_output():
     cloud_val = cloud_var.get()
     token = token_entry.get()
@@ -75,40 +191,34 @@ def run_upload_and_show_output():
     os.environ["GLOSSARY_CSV"] = csv_path
 
     # Disable buttons during upload
-    upload_btn.config(state="disabled")
-    test_btn.config(state="disabled")
-
-    # Create output window
-    output_win = tk.Toplevel(root)
-    output_win.title("Upload Output")
-    output_text = scrolledtext.ScrolledText(output_win, width=80, height=20)
-    output_text.pack(fill=tk.BOTH, expand=True)
-
-    def run_process():
-        old_stdout = sys.stdout
-        sys.stdout = mystdout = StringIO()
-
-        try:
-            main(cloud_val, email, token, csv_path)
-        except Exception as e:
-            print(f"Error during upload: {e}")
-        finally:
-            sys.stdout = old_stdout
-
-        output_text.insert(tk.END, mystdout.getvalue())
-        output_text.see(tk.END)
-
-        # Re-enable buttons
-        upload_btn.config(state="normal")
-        test_btn.config(state="normal")
-
-        if "Created page:" in mystdout.getvalue():
-            messagebox.showinfo("Upload Complete", "Glossary terms uploaded successfully!")
+    set_buttons_state("disabled")
+
+    def upload(on_event, cancel_event):
+        return main(cloud_val, email, token, csv_path, on_event=on_event, cancel_event=cancel_event)
+
+    def finished(rows, error, was_cancelled):
+        set_buttons_state("normal")
+
+        if isinstance(error, PreflightError):
+            messagebox.showerror("CSV Problems", f"Found {len(error.report.errors)} problems in the CSV, so nothing "
+                                                 f"was uploaded.\nSee output window for the full list.")
+            return
+        if error is not None:
+            messagebox.showerror("Upload Failed", f"Upload failed: {error}\nSee output window for details.")
+            return
+
+        counts = count_upload_statuses(rows)
+        summary = (f"{counts['created']} created, {counts['updated']} updated, "
+                   f"{counts['existing'] + counts['unchanged']} already up to date, "
+                   f"{counts['failed'] + counts['collided']} failed, {counts['skipped']} skipped.")
+        if was_cancelled:
+            messagebox.showinfo("Upload Cancelled", f"Upload cancelled.\n{summary}")
+        elif counts["failed"] or counts["collided"] or counts["unlabeled"]:
+            messagebox.showwarning("Upload Finished With Errors", f"{summary}\nSee output window for details.")
         else:
-            messagebox.showerror("Upload Failed", "Upload failed. See output window for details.")
+            messagebox.showinfo("Upload Complete", f"Glossary terms uploaded successfully!\n{summary}")
 
-
-    threading.Thread(target=run_process, daemon=True).start()
+    run_with_progress("Upload Output", "rows", upload, finished)
 
 def export_glossary():
     cloud_val = cloud_var.get()
@@ -119,52 +229,59 @@ def export_glossary():
         messagebox.showerror("Missing Info", "Please fill in all required fields.")
         return
 
-    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+    file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[
+        ("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"), ("Parquet files", "*.parquet")])
     if not file_path:
         return  # User cancelled
+    # The format follows the extension picked; anything else is written as CSV
+    export_format = format_for_path(file_path) or "csv"
 
     # Disable buttons during export
-    upload_btn.config(state="disabled")
-    test_btn.config(state="disabled")
-    export_btn.config(state="disabled")
+    set_buttons_state("disabled")
 
-    output_win = tk.Toplevel(root)
-    output_win.title("Export Output")
-    output_text = scrolledtext.ScrolledText(output_win, width=80, height=20)
-    output_text.pack(fill=tk.BOTH, expand=True)
+    def export(on_event, cancel_event):
+        return export_glossary_to_csv(cloud_val, email, token, None, on_event=on_event,
+                                      cancel_event=cancel_event, index_path=DEFAULT_INDEX_PATH,
+                                      outputs=[(export_format, file_path)])
 
-    def run_export():
-        old_stdout = sys.stdout
-        sys.stdout = mystdout = StringIO()
+    def finished(written, error, was_cancelled):
+        set_buttons_state("normal")
 
-        try:
-            export_glossary_to_csv(cloud_val, email, token, file_path)
-        except Exception as e:
-            print(f"Error during export: {e}")
-        finally:
-            sys.stdout = old_stdout
-
-        output_text.insert(tk.END, mystdout.getvalue())
-        output_text.see(tk.END)
-
-        # Re-enable buttons
-        upload_btn.config(state="normal")
-        test_btn.config(state="normal")
-        export_btn.config(state="normal")
-
-        if "Export complete." in mystdout.getvalue():
-            messagebox.showinfo("Export Complete", f"Glossary exported to:\n{file_path}")
+        if was_cancelled:
+            messagebox.showinfo("Export Cancelled", "Export cancelled; no file was written.")
+        elif error is not None:
+            messagebox.showerror("Export Failed", f"Export failed: {error}\nSee output window for details.")
         else:
-            messagebox.showerror("Export Failed", "Export failed. See output window for details.")
-
-    threading.Thread(target=run_export, daemon=True).start()
+            messagebox.showinfo("Export Complete", f"{written} glossary terms exported to:\n{file_path}")
+
+    run_with_progress("Export Output", "terms", export, finished)
+
+# Looks the query up in the offline index the last export left behind; no network, so it runs on every keystroke
+def search_terms(event=None):
+    query = search_entry.get().strip()
+    results_text.config(state="normal")
+    results_text.delete("1.0", tk.END)
+    if query:
+        if not os.path.exists(DEFAULT_INDEX_PATH):
+            results_text.insert(tk.END, "No offline index yet. Export the glossary once to build it.")
+        else:
+            try:
+                matches = search_glossary(query, limit=20)
+            except sqlite3.Error as e:
+                results_text.insert(tk.END, f"The offline index can't be read right now ({e}).")
+            else:
+                for match in matches:
+                    results_text.insert(tk.END, f"{match['term']}  [{match['category']}]\n    {match['snippet']}\n")
+                if not matches:
+                    results_text.insert(tk.END, f"No terms match '{query}'.")
+    results_text.config(state="disabled")
 
 
 # ----- UI Window -----
 root = tk.Tk()
 root.title("Glossary Page Uploader")
 root.configure(bg=BG_COLOR)
-root.geometry("600x400")
+root.geometry("600x620")
 
 cloud_var = tk.BooleanVar(value=True)
 tk.Checkbutton(root, text="Use Cloud", variable=cloud_var, command=toggle_cloud_inputs,
@@ -194,10 +311,19 @@ upload_btn = tk.Button(root, text="Upload Glossary Terms", command=run_upload_an
                        bg=BUTTON_BG, fg=BUTTON_FG)
 upload_btn.grid(row=5, column=1, pady=(10, 15))
 
-export_btn = tk.Button(root, text="Export Glossary to CSV", command=export_glossary, font=FONT,
+export_btn = tk.Button(root, text="Export Glossary", command=export_glossary, font=FONT,
                        bg=BUTTON_BG, fg=BUTTON_FG)
 export_btn.grid(row=6, column=1, pady=(5, 15))
 
+tk.Label(root, text="Search:", font=FONT, bg=BG_COLOR, fg=FG_COLOR).grid(row=7, column=0, sticky="e", padx=10, pady=5)
+search_entry = tk.Entry(root, width=40, font=FONT, bg=ENTRY_BG)
+search_entry.grid(row=7, column=1, padx=10)
+search_entry.bind("<KeyRelease>", search_terms)
+tk.Button(root, text="Search", command=search_terms, font=FONT,
+          bg=BUTTON_BG, fg=BUTTON_FG).grid(row=7, column=2, padx=5)
+results_text = scrolledtext.ScrolledText(root, width=70, height=10, state="disabled")
+results_text.grid(row=8, column=0, columnspan=3, padx=10, pady=(5, 10))
+
 toggle_cloud_inputs()
 
 root.mainloop()
@@ -0,0 +1,113 @@
+###############################################################################################################
+#
+#
+# Crash-safe record of a bulk upload run, used by bulkTerms_Confluence.py.
+# Every CSV row gets a line in a small SQLite file saying how far it got (pending, page_created, labeled,
+# failed, ...) and the ID of any page it created. Writes are committed in small batches, so a run that dies
+# at row 800 of 1,200 loses at most the last batch, and main(..., resume=True) picks up where it stopped:
+# finished rows are left alone and pages that were created but never labeled only get their label call.
+#
+#
+###############################################################################################################
+
+
+import hashlib
+import os
+import sqlite3
+import time
+
+# Journal states that mean a row needs nothing more on resume
+FINISHED_STATES = ("labeled", "updated", "unchanged", "exists")
+
+# Row statuses from bulkTerms_Confluence.py that are stored under a different journal state; every other
+# status is stored as-is. A page that exists but has no labels yet is "page_created" either way.
+JOURNAL_STATES = {
+    "update": "pending",
+    "label_pending": "page_created",
+    "created": "page_created",
+    "label_failed": "page_created"
+}
+
+
+# SHA-256 of the CSV, so a journal is never resumed against a different file
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, mode='rb') as csv_file:
+        for chunk in iter(lambda: csv_file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadJournal:
+    def __init__(self, journal_path, csv_file_path, resume=False, batch_size=25, batch_seconds=2.0):
+        self.path = journal_path
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.pending_writes = 0
+        self.last_commit = time.monotonic()
+        csv_digest = file_digest(csv_file_path)
+
+        if not resume and os.path.exists(journal_path):
+            os.remove(journal_path)
+
+        self.connection = sqlite3.connect(journal_path)
+        # WAL keeps committed batches safe if the process dies mid-write
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS run (
+                csv_path TEXT NOT NULL,
+                csv_sha256 TEXT NOT NULL,
+                started_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                row_index INTEGER PRIMARY KEY,
+                term TEXT NOT NULL,
+                state TEXT NOT NULL,
+                page_id TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+        """)
+
+        run = self.connection.execute("SELECT csv_sha256 FROM run").fetchone()
+        if run is None:
+            self.connection.execute("INSERT INTO run VALUES (?, ?, ?)",
+                                    (os.path.abspath(csv_file_path), csv_digest, time.time()))
+            self.connection.commit()
+        elif run[0] != csv_digest:
+            self.connection.close()
+            raise ValueError(f"'{csv_file_path}' has changed since journal '{journal_path}' was written; "
+                             f"run without resume to start over.")
+
+    # {row_index: (state, page_id)} for every row recorded so far
+    def load_states(self):
+        return {
+            row_index: (state, page_id)
+            for row_index, state, page_id in self.connection.execute("SELECT row_index, state, page_id FROM rows")
+        }
+
+    def record(self, row_index, term, state, page_id=None, error=None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO rows (row_index, term, state, page_id, error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (row_index, term, state, page_id, error, time.time())
+        )
+        self.pending_writes += 1
+        if self.pending_writes >= self.batch_size or time.monotonic() - self.last_commit >= self.batch_seconds:
+            self.flush()
+
+    # Records an upload row dict in its current state; rows carried over by resume are already recorded
+    def record_row(self, row, error=None):
+        if row["status"] == "resumed":
+            return
+        state = JOURNAL_STATES.get(row["status"], row["status"])
+        self.record(row["index"], row["term"], state, row["page_id"], error)
+
+    def flush(self):
+        self.connection.commit()
+        self.pending_writes = 0
+        self.last_commit = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
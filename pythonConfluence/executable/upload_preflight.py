@@ -0,0 +1,176 @@
+###############################################################################################################
+#
+#
+# Pre-flight check of an upload CSV, run by bulkTerms_Confluence.py before any request is sent. One pass over
+# the whole file finds every problem at once instead of one at a time halfway through an upload:
+# - missing Term / Definition / Category columns or values
+# - categories that don't match category_mapping (case, spacing and the parent page title are forgiven,
+#   e.g. " Enterprise  Tools " -> "enterprise tools"; near misses get a suggestion). An exported category
+#   path like "Enterprise Tools > Assessment Terms" is matched on its first segment; the rest names the
+#   sub-page the term goes under, which the upload looks up
+# - duplicate terms: exact repeats of a row are dropped with a warning; the same title with a different
+#   case, definition or category is an error, since Confluence titles are unique per space ignoring case
+# - titles Confluence would reject: longer than MAX_TITLE_LENGTH, control characters, or a
+#   leading "..", "$" or "~"
+#
+# The first occurrence of a duplicated term is kept. report.rows has one entry per CSV row, in file order,
+# so row indexes still line up with the upload journal.
+#
+# To check a file on its own: python glossary_cli.py validate terms.csv
+#
+#
+###############################################################################################################
+
+
+import csv
+import difflib
+import html
+import re
+
+REQUIRED_COLUMNS = ("Term", "Definition", "Category")
+
+# Joins the page titles of an exported category path
+CATEGORY_SEPARATOR = ">"
+
+# Confluence's page title limit; titles are sent as plain text
+MAX_TITLE_LENGTH = 255
+ILLEGAL_TITLE_CHARACTERS = re.compile(r"[\x00-\x1f\x7f]")
+ILLEGAL_TITLE_PREFIXES = ("..", "$", "~")
+
+
+# Raised by the upload when the pre-flight check finds errors, before any request is sent
+class PreflightError(ValueError):
+    def __init__(self, report):
+        super().__init__(f"The CSV failed the pre-flight check with {len(report.errors)} errors; nothing was "
+                         f"uploaded. Fix them, or upload the valid rows only with allow_invalid_rows.")
+        self.report = report
+
+
+# Problems that keep rows out of the upload (errors), or that were fixed up on the way (warnings)
+class PreflightReport:
+    def __init__(self, csv_file_path):
+        self.csv_file_path = csv_file_path
+        self.rows = []
+        self.errors = []
+        self.warnings = []
+
+    def error(self, line, message):
+        self.errors.append(f"Line {line}: {message}" if line else message)
+
+    def warning(self, line, message):
+        self.warnings.append(f"Line {line}: {message}" if line else message)
+
+    @property
+    def valid_rows(self):
+        return [row for row in self.rows if row["valid"]]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        return (f"Checked {len(self.rows)} rows in {self.csv_file_path}: {len(self.valid_rows)} ready to upload, "
+                f"{len(self.errors)} errors, {len(self.warnings)} warnings.")
+
+    def lines(self):
+        return ([f"Error: {message}" for message in self.errors]
+                + [f"Warning: {message}" for message in self.warnings]
+                + [self.summary()])
+
+
+# Mapping key for a category as typed in the CSV, or None: matches keys and parent page titles, ignoring
+# case and runs of whitespace
+def normalize_category(category, category_mapping):
+    key = " ".join(category.split()).casefold()
+    if key in category_mapping:
+        return key
+    for mapping_key, mapping in category_mapping.items():
+        if mapping["parent_title"].casefold() == key:
+            return mapping_key
+    return None
+
+
+# "Enterprise Tools > Assessment Terms" -> ["Enterprise Tools", "Assessment Terms"], whitespace collapsed
+def split_category_path(category):
+    return [" ".join(segment.split()) for segment in category.split(CATEGORY_SEPARATOR)]
+
+
+def title_problem(term):
+    if len(term) > MAX_TITLE_LENGTH:
+        return f"title is {len(term)} characters; Confluence allows {MAX_TITLE_LENGTH}"
+    if ILLEGAL_TITLE_CHARACTERS.search(term):
+        return "title contains control characters"
+    if term.startswith(ILLEGAL_TITLE_PREFIXES):
+        return f"title can't start with {' or '.join(repr(prefix) for prefix in ILLEGAL_TITLE_PREFIXES)}"
+    return None
+
+
+# Checks the whole CSV and returns a PreflightReport. Each report.rows entry is
+#   {"index", "line", "term", "definition", "category", "subcategory", "valid"}
+# with the category as its category_mapping key (None if it didn't match), subcategory as the tuple of
+# sub-page titles below that category's parent page (empty for a plain category) and valid=False for rows
+# that must not be uploaded, whether for an error or as a dropped exact duplicate.
+def validate_upload_csv(csv_file_path, category_mapping):
+    report = PreflightReport(csv_file_path)
+    # Term as matched against existing pages (unescaped, case-folded) -> first row carrying it
+    first_rows = {}
+    # Line the next row starts on; a quoted definition can span several lines
+    next_line = 2
+
+    with open(csv_file_path, mode='r', encoding='utf-8-sig') as csvfile:
+        reader = csv.DictReader(csvfile)
+        missing_columns = [name for name in REQUIRED_COLUMNS if name not in (reader.fieldnames or ())]
+        if missing_columns:
+            report.error(None, f"Missing column{'s' if len(missing_columns) > 1 else ''} "
+                               f"{', '.join(missing_columns)}; the header must have {', '.join(REQUIRED_COLUMNS)}.")
+            return report
+
+        for index, row in enumerate(reader):
+            line, next_line = next_line, reader.line_num + 1
+            term = (row.get("Term") or "").strip()
+            definition = (row.get("Definition") or "").strip()
+            raw_category = (row.get("Category") or "").strip()
+            top_category, *subcategory = split_category_path(raw_category)
+            category = normalize_category(top_category, category_mapping) if top_category else None
+            entry = {"index": index, "line": line, "term": term, "definition": definition, "category": category,
+                     "subcategory": tuple(subcategory), "valid": False}
+            report.rows.append(entry)
+
+            missing = [name for name, value in zip(REQUIRED_COLUMNS, (term, definition, raw_category)) if not value]
+            if missing:
+                report.error(line, f"missing {', '.join(missing)}" + (f" for term '{term}'" if term else ""))
+                continue
+
+            if category is None:
+                suggestion = difflib.get_close_matches(top_category.casefold(), list(category_mapping), n=1)
+                hint = f"; did you mean '{suggestion[0]}'?" if suggestion else ""
+                report.error(line, f"unknown category '{raw_category}' for term '{term}'{hint}")
+                continue
+            # Plain case differences were always accepted; only mention fix-ups beyond that
+            if top_category.lower() != category:
+                report.warning(line, f"category '{raw_category}' read as '{category}'")
+            if not all(subcategory):
+                report.error(line, f"category path '{raw_category}' for term '{term}' has an empty page title")
+                continue
+
+            problem = title_problem(term)
+            if problem:
+                report.error(line, f"term '{term[:60]}': {problem}")
+                continue
+
+            first = first_rows.get(html.unescape(term).casefold())
+            if first is not None:
+                if ((first["term"], first["definition"], first["category"], first["subcategory"])
+                        == (term, definition, category, entry["subcategory"])):
+                    report.warning(line, f"duplicate of line {first['line']} ('{term}'); dropped")
+                else:
+                    report.error(line, f"term '{term}' conflicts with line {first['line']} ('{first['term']}'); "
+                                       f"Confluence titles must be unique ignoring case")
+                continue
+
+            first_rows[html.unescape(term).casefold()] = entry
+            entry["valid"] = True
+
+    if not report.rows:
+        report.error(None, "The CSV has no rows.")
+    return report
@@ -25,6 +25,11 @@ import requests
 import csv
 import html
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# A listing or page body that couldn't be read. The export stops instead of writing a CSV with terms missing.
+class ConfluenceReadError(Exception):
+    pass
 
 def get_pageid_by_title(title, space_key, base_url, headers, auth, cloud):
     url = f"{base_url}/rest/api/content"
@@ -41,14 +46,47 @@ def get_pageid_by_title(title, space_key, base_url, headers, auth, cloud):
     print(f"Could not find page ID for title '{title}' in space '{space_key}'")
     return None
 
-def get_child_pages(parent_page_id, base_url, headers, auth, cloud):
+# Walks the child listing with start/limit until Confluence stops returning a _links.next,
+# yielding each page as soon as its batch arrives. With expand="body.storage" every page comes
+# back with its body, so the export doesn't need a request per term. A batch that still fails once the
+# fallbacks below are used up raises ConfluenceReadError rather than ending the listing early.
+def iter_child_pages(parent_page_id, base_url, headers, auth, cloud, page_size=200, expand=None):
     url = f"{base_url}/rest/api/content/{parent_page_id}/child/page"
-    response = requests.get(url, headers=headers, **({"auth": auth} if cloud else {}))
-    if response.status_code == 200:
-        return response.json().get("results", [])
-    else:
-        print(f"Failed to get child pages for parent {parent_page_id}")
-        return []
+    start = 0
+    limit = page_size
+    while True:
+        params = {"start": start, "limit": limit}
+        if expand:
+            params["expand"] = expand
+        response = requests.get(url, headers=headers, params=params, **({"auth": auth} if cloud else {}))
+        if response.status_code != 200:
+            # Some servers refuse large expanded batches, so shrink the batch before giving up
+            # on the expansion; pages listed without a body are fetched one at a time instead.
+            # Auth and missing-page errors won't improve with a smaller batch.
+            refused = expand and response.status_code not in (401, 403, 404)
+            if refused and limit > 25:
+                limit = max(25, limit // 2)
+                continue
+            if refused:
+                print(f"Expanded listing refused for parent {parent_page_id} ({response.status_code}); "
+                      f"falling back to per-page fetches")
+                expand = None
+                limit = page_size
+                continue
+            raise ConfluenceReadError(f"Failed to get child pages for parent {parent_page_id} "
+                                      f"(start {start}, status {response.status_code})")
+
+        data = response.json()
+        results = data.get("results", [])
+        yield from results
+
+        # The server may cap the limit below page_size, so advance by what actually came back
+        if not results or not data.get("_links", {}).get("next"):
+            return
+        start += len(results)
+
+def get_child_pages(parent_page_id, base_url, headers, auth, cloud, page_size=200, expand=None):
+    return list(iter_child_pages(parent_page_id, base_url, headers, auth, cloud, page_size, expand))
 
 def get_page_content(page_id, base_url, headers, auth, cloud):
     url = f"{base_url}/rest/api/content/{page_id}?expand=body.storage"
@@ -56,8 +94,7 @@ def get_page_content(page_id, base_url, headers, auth, cloud):
     if response.status_code == 200:
         return response.json()["body"]["storage"]["value"]
     else:
-        print(f"Failed to get content for page {page_id}")
-        return ""
+        raise ConfluenceReadError(f"Failed to get content for page {page_id} ({response.status_code})")
 
 
 def extract_definition_from_html(html_content):
@@ -101,7 +138,8 @@ def extract_definition_from_html(html_content):
     return definition.strip()
 
 
-def export_glossary_to_csv(cloud, email, api_token, csv_file_path):
+def export_glossary_to_csv(cloud, email, api_token, csv_file_path, max_workers=8, page_size=200,
+                           expand_bodies=True):
     if cloud:
         auth = (email, api_token)
         base_url = "https://tylertech.atlassian.net/wiki"
@@ -124,28 +162,42 @@ def export_glossary_to_csv(cloud, email, api_token, csv_file_path):
         "general terms": "General Terms"
     }
 
-    rows = []
+    # Only list the bodies inline when expand_bodies is on; otherwise every term costs a request
+    listing_expand = "body.storage" if expand_bodies else None
+
+    def fetch_row(page, parent_title):
+        storage = page.get("body", {}).get("storage")
+        if storage is not None:
+            content_html = storage.get("value", "")
+        else:
+            content_html = get_page_content(page["id"], base_url, headers, auth, cloud)
+        definition = extract_definition_from_html(content_html)
+
+        return {
+            "Term": page["title"],
+            "Definition": definition,
+            "Category": parent_title
+        }
 
-    for category_key, parent_title in category_mapping.items():
-        parent_page_id = get_pageid_by_title(parent_title, space_key, base_url, headers, auth, cloud)
-        if not parent_page_id:
-            print(f"Skipping category '{category_key}' due to missing parent page ID.")
-            continue
+    # Body fetches are queued as soon as each listing batch arrives; collecting the futures in
+    # submission order keeps rows ordered by category, then child order
+    futures = []
 
-        child_pages = get_child_pages(parent_page_id, base_url, headers, auth, cloud)
-        print(f"Found {len(child_pages)} terms in category '{category_key}'")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for category_key, parent_title in category_mapping.items():
+            parent_page_id = get_pageid_by_title(parent_title, space_key, base_url, headers, auth, cloud)
+            if not parent_page_id:
+                # Skipping it would write a CSV without that category's terms
+                raise ConfluenceReadError(f"Couldn't find the parent page for '{category_key}'; nothing was exported.")
 
-        for page in child_pages:
-            term = page["title"]
-            page_id = page["id"]
-            content_html = get_page_content(page_id, base_url, headers, auth, cloud)
-            definition = extract_definition_from_html(content_html)
+            child_count = 0
+            for page in iter_child_pages(parent_page_id, base_url, headers, auth, cloud, page_size,
+                                         listing_expand):
+                futures.append(executor.submit(fetch_row, page, parent_title))
+                child_count += 1
+            print(f"Found {child_count} terms in category '{category_key}'")
 
-            rows.append({
-                "Term": term,
-                "Definition": definition,
-                "Category": parent_title
-            })
+        rows = [future.result() for future in futures]
 
     # Write to CSV
     with open(csv_file_path, mode='w', encoding='utf-8', newline='') as csvfile:
@@ -162,11 +214,15 @@ def export_glossary_to_csv(cloud, email, api_token, csv_file_path):
 # ----------------------- TO RUN: Update this with your info, then click Start: ----------------------------------------------------------------
 # You may need to go to: Tools -> Python -> Python Environments -> Open in PowerShell
 # Run: python -m pip install requests
-export_glossary_to_csv(
-    cloud=False,
-    email="your.email@tylertech.com",
-    api_token="",
-    csv_file_path="exported_glossary.csv"
-)
+if __name__ == "__main__":
+    export_glossary_to_csv(
+        cloud=False,
+        email="your.email@tylertech.com",
+        api_token="",
+        csv_file_path="exported_glossary.csv",
+        max_workers=8,
+        page_size=200,
+        expand_bodies=True
+    )
 # ----------------------------------------------------------------------------------------------------------------------------------------------
 ################################################################################################################################################
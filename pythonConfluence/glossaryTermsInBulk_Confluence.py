@@ -29,16 +29,23 @@
 import csv
 import html
 import requests
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 space_key = "iassupport"
 
+# Every uploaded page gets these labels, plus its category's own labels from category_mapping
+glossary_labels = ["glossary-terms"]
+
 # Mapping categories to labels and parent page IDs
 category_mapping = {
-    "enterprise assessment": { "parent_title": "Enterprise Assessment" },
-    "enterprise property tax": { "parent_title": "Enterprise Property Tax" },
-    "enterprise tools": { "parent_title": "Enterprise Tools" },
-    "common rolltypes": { "parent_title": "Common Rolltypes" },
-    "general terms": { "parent_title": "General Terms" }
+    "enterprise assessment": { "parent_title": "Enterprise Assessment", "labels": ["enterprise-assessment"] },
+    "enterprise property tax": { "parent_title": "Enterprise Property Tax", "labels": ["enterprise-property-tax"] },
+    "enterprise tools": { "parent_title": "Enterprise Tools", "labels": ["enterprise-tools"] },
+    "common rolltypes": { "parent_title": "Common Rolltypes", "labels": ["common-rolltypes"] },
+    "general terms": { "parent_title": "General Terms", "labels": ["general-terms"] }
 }
 
 # Helper function to preserve multiline formatting
@@ -63,7 +70,59 @@ def get_pageid_by_title(title, space_key, base_url, headers, cloud, auth):
     return None
 
 
-def main(cloud, email, api_token, csv_file_path):
+# Optional on-disk cache of parent page IDs, keyed by base URL, space key and title
+def load_pageid_cache(cache_path):
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, mode='r', encoding='utf-8') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable page ID cache '{cache_path}': {e}")
+        return {}
+
+def save_pageid_cache(cache_path, cache):
+    if not cache_path:
+        return
+    # Write to a temp file first so an interrupted run never leaves a truncated cache behind
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, mode='w', encoding='utf-8') as cache_file:
+        json.dump(cache, cache_file, indent=2)
+    os.replace(tmp_path, cache_path)
+
+# Resolves every category's parent page ID once per run, concurrently, instead of once per CSV row.
+# Entries younger than cache_ttl seconds are taken from the cache without a request.
+def resolve_parent_page_ids(base_url, headers, cloud, auth, cache_path=None, cache_ttl=24 * 60 * 60):
+    cache = load_pageid_cache(cache_path)
+    now = time.time()
+    parent_ids = {}
+    to_lookup = []
+
+    for category, mapping in category_mapping.items():
+        cached = cache.get(f"{base_url}|{space_key}|{mapping['parent_title']}")
+        if cached and now - cached["resolved_at"] < cache_ttl:
+            parent_ids[category] = cached["id"]
+        else:
+            to_lookup.append(category)
+
+    if to_lookup:
+        def lookup(category):
+            parent_title = category_mapping[category]["parent_title"]
+            return get_pageid_by_title(parent_title, space_key, base_url, headers, cloud, auth)
+
+        with ThreadPoolExecutor(max_workers=len(to_lookup)) as executor:
+            for category, page_id in zip(to_lookup, executor.map(lookup, to_lookup)):
+                parent_ids[category] = page_id
+                if page_id:
+                    cache[f"{base_url}|{space_key}|{category_mapping[category]['parent_title']}"] = {
+                        "id": page_id,
+                        "resolved_at": now
+                    }
+        save_pageid_cache(cache_path, cache)
+
+    return parent_ids
+
+def main(cloud, email, api_token, csv_file_path, parent_id_cache=None, parent_id_cache_ttl=24 * 60 * 60):
     if cloud:
         auth = (email, api_token)
         base_url = "https://tylertech.atlassian.net/wiki"
@@ -76,6 +135,12 @@ def main(cloud, email, api_token, csv_file_path):
             "Content-Type": "application/json"
         }
 
+    # Look up the category parent pages once, up front
+    parent_ids = resolve_parent_page_ids(base_url, headers, cloud, auth, parent_id_cache, parent_id_cache_ttl)
+
+    # Set once the server has refused labels in a create payload; later rows go straight to create -> label
+    inline_labels_rejected = False
+
     # Read CSV
     with open(csv_file_path, mode='r', encoding='utf-8-sig') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -96,8 +161,7 @@ def main(cloud, email, api_token, csv_file_path):
                 print(f"Warning: Category '{category}' not found in mapping. Skipping term '{term}'.")
                 continue
 
-            parent_title = mapping["parent_title"]
-            parent_page_id = get_pageid_by_title(parent_title, space_key, base_url, headers, cloud, auth)
+            parent_page_id = parent_ids.get(category)
 
             if not parent_page_id:
                 print(f"Skipping term '{term}' due to missing parent page ID.")
@@ -115,6 +179,12 @@ def main(cloud, email, api_token, csv_file_path):
             </ac:structured-macro>
             """
 
+            # Labels: category-specific + 'glossary-terms'
+            labels = [
+                {"prefix": "global", "name": label}
+                for label in glossary_labels + [l for l in mapping.get("labels", []) if l not in glossary_labels]
+            ]
+
             # Payload to create Confluence page
             payload = {
                 "type": "page",
@@ -126,10 +196,14 @@ def main(cloud, email, api_token, csv_file_path):
                         "value": page_properties_body,
                         "representation": "storage"
                     }
-                }
+                },
+                "metadata": {"labels": labels}
             }
 
-            # Create the page
+            # Create the page with its labels in one request
+            labeled_inline = not inline_labels_rejected
+            if not labeled_inline:
+                del payload["metadata"]
             create_response = requests.post(
                 f"{base_url}/rest/api/content",
                 headers=headers,
@@ -137,14 +211,28 @@ def main(cloud, email, api_token, csv_file_path):
                 **({"auth": auth} if cloud else {})
             )
 
-            if create_response.status_code in (200, 201):
+            # A 400 may be the server refusing metadata.labels; create without them and label separately
+            if create_response.status_code == 400 and labeled_inline:
+                del payload["metadata"]
+                create_response = requests.post(
+                    f"{base_url}/rest/api/content",
+                    headers=headers,
+                    json=payload,
+                    **({"auth": auth} if cloud else {})
+                )
+                labeled_inline = False
+                if create_response.status_code in (200, 201):
+                    inline_labels_rejected = True
+                    print("Inline labels rejected by the server; adding labels with a separate call.")
+
+            if create_response.status_code in (200, 201) and labeled_inline:
                 page_id = create_response.json()["id"]
                 print(f"Created page: {term} (ID: {page_id})")
+                print(f"Added labels to: {term}")
 
-                # Add labels: category-specific + 'glossary-terms'
-                labels = [
-                    {"prefix": "global", "name": "glossary-terms"}
-                ]
+            elif create_response.status_code in (200, 201):
+                page_id = create_response.json()["id"]
+                print(f"Created page: {term} (ID: {page_id})")
 
                 label_response = requests.post(
                     f"{base_url}/rest/api/content/{page_id}/label",
@@ -170,11 +258,13 @@ def main(cloud, email, api_token, csv_file_path):
 # ----------------------- TO RUN: Update this with your info, then click Start: ----------------------------------------------------------------
 # You may need to go to: Tools -> Python -> Python Environments -> Open in PowerShell
 # Run: python -m pip install requests
-main(
-    cloud=False, 
-    email=None, 
-    api_token="", 
-    csv_file_path=r"C:\Users\.csv"
-)
+if __name__ == "__main__":
+    main(
+        cloud=False, 
+        email=None, 
+        api_token="", 
+        csv_file_path=r"C:\Users\.csv",
+        parent_id_cache=None  # e.g. "parent_ids.json" to skip the parent page lookups on later runs
+    )
 # ----------------------------------------------------------------------------------------------------------------------------------------------
 ################################################################################################################################################
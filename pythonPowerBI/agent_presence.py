@@ -0,0 +1,247 @@
+###############################################################################################################
+#
+#
+# Per-agent, per-day presence hours from the msdyn_agentstatushistory extract (the agent status SQL in
+# DAX/PowerBI_Stuff), so Power BI loads one compact row per agent and day instead of one per interval.
+#
+# The raw intervals are read in chunks. Each chunk is:
+# - filtered like the SQL: start and end present, presence not 'offline'
+# - split at every midnight it crosses, so an 22:00-02:00 shift counts 2h on each day
+# - summed per agent, day and presence
+# Those partial sums are added into a small SQLite accumulator on disk. Memory therefore stays at about
+# one chunk however many months of history are fed in. The pivot is then streamed out of SQLite:
+#   agent_id, agent_name, day, AvailableHours, BusyDNDHours, BusyHours, AwayHours, OtherHours, TotalHours
+# OtherHours collects any other non-offline presence; TotalHours is the sum of the rest.
+#
+# Times are used as given (Dataverse extracts are UTC). Pass timezone="America/Chicago" to split days
+# at local midnight instead. Durations are still measured between UTC instants, so a shift across a DST
+# change counts the hours actually worked; the zone only decides where each day starts.
+#
+# Input can be .csv or .parquet and output .csv or .parquet (Parquet needs pyarrow).
+#
+# To run: python agent_presence.py agentstatushistory.csv presence_by_day.csv [--timezone America/Chicago]
+#
+#
+###############################################################################################################
+
+
+import argparse
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+AGENT_ID_COLUMN = "msdyn_agentid"
+AGENT_NAME_COLUMN = "msdyn_agentidname"
+PRESENCE_COLUMN = "msdyn_presenceidname"
+START_COLUMN = "msdyn_starttime"
+END_COLUMN = "msdyn_endtime"
+
+# Presence name -> pivot column, as in the SQL's CASE expressions
+PRESENCE_COLUMNS = {
+    "Available": "AvailableHours",
+    "BusyDND": "BusyDNDHours",
+    "Busy": "BusyHours",
+    "Away": "AwayHours"
+}
+OTHER_COLUMN = "OtherHours"
+PIVOT_COLUMNS = (["agent_id", "agent_name", "day"] + list(PRESENCE_COLUMNS.values())
+                 + [OTHER_COLUMN, "TotalHours"])
+
+CHUNK_ROWS = 200000
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    columns = [AGENT_ID_COLUMN, AGENT_NAME_COLUMN, PRESENCE_COLUMN, START_COLUMN, END_COLUMN]
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows, encoding="utf-8-sig")
+
+
+# UTC instants (naive) at which the given local days start, and at which the day after each one starts.
+# A midnight skipped by DST starts the day at the first local time that exists; a repeated one, at the
+# earlier of the two.
+def day_boundaries(days, timezone=None):
+    if not timezone:
+        return days.astype("datetime64[ns]"), (days + 1).astype("datetime64[ns]")
+    # Only the distinct days need localizing; a chunk covers a handful of them
+    candidates = np.unique(np.concatenate([days, days + 1]))
+    midnights = (pd.DatetimeIndex(candidates.astype("datetime64[ns]"))
+                 .tz_localize(timezone, ambiguous=np.ones(len(candidates), dtype=bool),
+                              nonexistent="shift_forward")
+                 .tz_convert("UTC").tz_localize(None).to_numpy())
+    return midnights[np.searchsorted(candidates, days)], midnights[np.searchsorted(candidates, days + 1)]
+
+
+# One chunk of raw intervals -> seconds per (agent_id, agent_name, day, presence), with every interval split
+# at the midnights it crosses
+def day_segments(chunk, timezone=None):
+    # Naive times are taken as UTC. Durations come from the UTC instants; local wall-clock time only
+    # picks the day each end falls on.
+    start = pd.to_datetime(chunk[START_COLUMN], errors="coerce", utc=True)
+    end = pd.to_datetime(chunk[END_COLUMN], errors="coerce", utc=True)
+    local_start = start.dt.tz_convert(timezone or "UTC").dt.tz_localize(None)
+    local_end = end.dt.tz_convert(timezone or "UTC").dt.tz_localize(None)
+    start = start.dt.tz_localize(None)
+    end = end.dt.tz_localize(None)
+    # Presence names compare case-insensitively, as under the SQL's collation
+    presence = chunk[PRESENCE_COLUMN].fillna("").astype(str)
+    lowered = presence.str.lower()
+    presence = lowered.map({name.lower(): name for name in PRESENCE_COLUMNS}).fillna(presence)
+
+    keep = (start.notna() & end.notna() & lowered.ne("offline") & end.gt(start)).to_numpy()
+    start = start.to_numpy()[keep]
+    end = end.to_numpy()[keep]
+    local_start = local_start.to_numpy()[keep]
+    local_end = local_end.to_numpy()[keep]
+    if not len(start):
+        return pd.DataFrame(columns=["agent_id", "agent_name", "day", "presence", "seconds"])
+
+    # Interval i covers days first_day[i] .. first_day[i] + extra_days[i]; repeat it once per day
+    first_day = local_start.astype("datetime64[D]")
+    extra_days = (local_end.astype("datetime64[D]") - first_day).astype(np.int64)
+    repeats = extra_days + 1
+    row = np.repeat(np.arange(len(start)), repeats)
+    offset = np.arange(len(row)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    day = first_day[row] + offset.astype("timedelta64[D]")
+    day_start, day_end = day_boundaries(day, timezone)
+    segment_start = np.maximum(start[row], day_start.astype(start.dtype))
+    segment_end = np.minimum(end[row], day_end.astype(end.dtype))
+    seconds = (segment_end - segment_start) / np.timedelta64(1, "s")
+
+    segments = pd.DataFrame({
+        "agent_id": chunk[AGENT_ID_COLUMN].to_numpy()[keep][row],
+        "agent_name": chunk[AGENT_NAME_COLUMN].to_numpy()[keep][row],
+        "day": day,
+        "presence": presence.to_numpy()[keep][row],
+        "seconds": seconds
+    })
+    # An interval ending exactly at midnight leaves an empty segment on the next day
+    segments = segments[segments["seconds"] > 0]
+    totals = segments.groupby(["agent_id", "agent_name", "day", "presence"], sort=False, dropna=False,
+                              as_index=False)["seconds"].sum()
+    totals["day"] = pd.to_datetime(totals["day"]).dt.strftime("%Y-%m-%d")
+    return totals
+
+
+# Running per-agent, per-day totals in SQLite, so memory doesn't grow with the length of history
+class PresenceAccumulator:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS presence (
+                agent_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                presence TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                PRIMARY KEY (agent_id, day, presence)
+            );
+            CREATE TABLE IF NOT EXISTS agents (agent_id TEXT PRIMARY KEY, agent_name TEXT);
+        """)
+
+    def add(self, segments):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO presence (agent_id, day, presence, seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (agent_id, day, presence) DO UPDATE SET seconds = seconds + excluded.seconds",
+                zip(segments["agent_id"].astype(str), segments["day"], segments["presence"],
+                    segments["seconds"].astype(float)))
+            # The latest name wins if an agent was renamed
+            self.connection.executemany(
+                "INSERT INTO agents (agent_id, agent_name) VALUES (?, ?) "
+                "ON CONFLICT (agent_id) DO UPDATE SET agent_name = excluded.agent_name",
+                segments[["agent_id", "agent_name"]].drop_duplicates("agent_id", keep="last")
+                .astype(str).itertuples(index=False, name=None))
+
+    # The pivot, ordered by agent and day, fetch_rows rows at a time
+    def iter_pivot(self, fetch_rows=CHUNK_ROWS):
+        known = list(PRESENCE_COLUMNS)
+        columns = ",\n".join(
+            "SUM(CASE WHEN p.presence = ? THEN p.seconds ELSE 0 END) / 3600.0" for _ in known)
+        cursor = self.connection.execute(
+            f"""SELECT p.agent_id, a.agent_name, p.day,
+                       {columns},
+                       SUM(CASE WHEN p.presence NOT IN ({", ".join("?" for _ in known)})
+                           THEN p.seconds ELSE 0 END) / 3600.0,
+                       SUM(p.seconds) / 3600.0
+                FROM presence p LEFT JOIN agents a ON a.agent_id = p.agent_id
+                GROUP BY p.agent_id, p.day
+                ORDER BY a.agent_name, p.agent_id, p.day""",
+            known + known)
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                return
+            yield pd.DataFrame(rows, columns=PIVOT_COLUMNS)
+
+    def close(self):
+        self.connection.close()
+
+
+# Streams the pivot to a .csv or .parquet file; returns the number of agent-days written
+def write_pivot(accumulator, output_path):
+    written = 0
+    tmp_path = f"{output_path}.tmp"
+    parquet_writer = None
+    try:
+        for frame in accumulator.iter_pivot():
+            if output_path.lower().endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(tmp_path, table.schema)
+                parquet_writer.write_table(table)
+            else:
+                frame.to_csv(tmp_path, mode='w' if written == 0 else 'a', header=written == 0, index=False,
+                             encoding="utf-8")
+            written += len(frame)
+        if written == 0:
+            if output_path.lower().endswith(".parquet"):
+                # An empty table with the schema the pivot has when it has rows
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                schema = pa.schema([(column, pa.string()) for column in PIVOT_COLUMNS[:3]]
+                                   + [(column, pa.float64()) for column in PIVOT_COLUMNS[3:]])
+                pq.write_table(schema.empty_table(), tmp_path)
+            else:
+                pd.DataFrame(columns=PIVOT_COLUMNS).to_csv(tmp_path, index=False, encoding="utf-8")
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+    os.replace(tmp_path, output_path)
+    return written
+
+
+# Raw interval extract -> per-agent, per-day pivot at output_path. Returns (intervals read, agent-days written).
+# The accumulator lives in a temporary file unless work_db is given.
+def aggregate_presence(input_path, output_path, timezone=None, chunk_rows=CHUNK_ROWS, work_db=None):
+    with tempfile.TemporaryDirectory() as workdir:
+        accumulator = PresenceAccumulator(work_db or os.path.join(workdir, "presence.db"))
+        try:
+            intervals = 0
+            for chunk in iter_chunks(input_path, chunk_rows):
+                intervals += len(chunk)
+                accumulator.add(day_segments(chunk, timezone))
+            return intervals, write_pivot(accumulator, output_path)
+        finally:
+            accumulator.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Pivot agent presence history into hours per agent and day.")
+    arg_parser.add_argument("input", help="msdyn_agentstatushistory extract (.csv or .parquet)")
+    arg_parser.add_argument("output", help="pivot to write (.csv or .parquet)")
+    arg_parser.add_argument("--timezone", help="split days at local midnight in this zone (default: as given)")
+    arg_parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="intervals read at a time")
+    args = arg_parser.parse_args()
+
+    read, written = aggregate_presence(args.input, args.output, args.timezone, args.chunk_rows)
+    print(f"Read {read} intervals; wrote {written} agent-days to {os.path.abspath(args.output)}")
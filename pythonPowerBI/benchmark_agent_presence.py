@@ -0,0 +1,103 @@
+###############################################################################################################
+#
+#
+# Benchmark for agent_presence.py: writes synthetic msdyn_agentstatushistory extracts covering more and more
+# months, aggregates each one and reports wall time and peak Python memory (tracemalloc). Peak memory
+# should stay flat as the history grows, since only one chunk of intervals is held at a time.
+#
+# Wall time is measured in its own untraced run, as tracemalloc slows Python down several times over.
+#
+# To run: python benchmark_agent_presence.py [--months 1,3,12] [--agents 100] [--intervals-per-day 30]
+#
+#
+###############################################################################################################
+
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from agent_presence import (
+    AGENT_ID_COLUMN,
+    AGENT_NAME_COLUMN,
+    END_COLUMN,
+    PRESENCE_COLUMN,
+    START_COLUMN,
+    aggregate_presence
+)
+
+PRESENCES = np.array(["Available", "Busy", "BusyDND", "Away", "Offline", "Inactive"])
+
+
+# Each agent's day is a run of back-to-back intervals with random lengths, so some cross midnight.
+# Written one day at a time; returns the number of intervals.
+def write_history(path, months, agents, intervals_per_day, seed=1):
+    rng = np.random.default_rng(seed)
+    agent_ids = np.array([f"agent-{i:04d}" for i in range(agents)])
+    agent_names = np.array([f"Agent {i:04d}" for i in range(agents)])
+    days = months * 30
+    clock = np.full(agents, np.datetime64("2025-01-01T06:00:00", "s"))
+    intervals = 0
+    for day in range(days):
+        rows = agents * intervals_per_day
+        agent = np.tile(np.arange(agents), intervals_per_day)
+        seconds = rng.integers(60, 2 * 86400 // intervals_per_day, rows)
+        # Consecutive intervals per agent: each starts where that agent's previous one ended
+        order = np.argsort(agent, kind="stable")
+        ends = np.empty(rows, dtype="datetime64[s]")
+        per_agent = seconds[order].reshape(agents, intervals_per_day).cumsum(axis=1)
+        ends[order] = (clock[:, None] + per_agent.astype("timedelta64[s]")).ravel()
+        starts = ends - seconds.astype("timedelta64[s]")
+        clock = clock + per_agent[:, -1].astype("timedelta64[s]")
+        pd.DataFrame({
+            AGENT_ID_COLUMN: agent_ids[agent],
+            AGENT_NAME_COLUMN: agent_names[agent],
+            PRESENCE_COLUMN: PRESENCES[rng.integers(0, len(PRESENCES), rows)],
+            START_COLUMN: pd.to_datetime(starts).strftime("%Y-%m-%d %H:%M:%S"),
+            END_COLUMN: pd.to_datetime(ends).strftime("%Y-%m-%d %H:%M:%S")
+        }).to_csv(path, mode='w' if day == 0 else 'a', header=day == 0, index=False)
+        intervals += rows
+    return intervals
+
+
+def measure(func, *args, trace_memory=False):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the streaming agent presence pivot.")
+    arg_parser.add_argument("--months", default="1,3,12", help="comma-separated history lengths")
+    arg_parser.add_argument("--agents", type=int, default=100)
+    arg_parser.add_argument("--intervals-per-day", type=int, default=30, help="intervals per agent and day")
+    arg_parser.add_argument("--skip-memory", action="store_true", help="skip the tracemalloc run for peak memory")
+    args = arg_parser.parse_args()
+
+    print(f"{'months':>7}{'intervals':>12}{'agent-days':>12}{'seconds':>10}{'rows/s':>12}{'peak MiB':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for months in (int(months) for months in args.months.split(",")):
+            history_path = os.path.join(workdir, f"history_{months}.csv")
+            output_path = os.path.join(workdir, f"presence_{months}.csv")
+            write_history(history_path, months, args.agents, args.intervals_per_day)
+
+            (intervals, agent_days), elapsed, _ = measure(aggregate_presence, history_path, output_path)
+            peak = "-"
+            if not args.skip_memory:
+                _, _, traced_peak = measure(aggregate_presence, history_path, output_path, trace_memory=True)
+                peak = f"{traced_peak:.1f}"
+            print(f"{months:>7}{intervals:>12}{agent_days:>12}{elapsed:>10.2f}{intervals / elapsed:>12,.0f}"
+                  f"{peak:>10}", flush=True)
@@ -0,0 +1,103 @@
+###############################################################################################################
+#
+#
+# Benchmark for case_linking.py on a synthetic Query3 extract (1M note rows by default, ~5 notes per case,
+# about a fifth of the notes linking an article).
+#
+# Besides the vectorized pass it times a row-by-row version written the way the DAX calculated columns
+# evaluate (every row re-filters the table for its CRM_ID). That one is quadratic, so it only runs on the
+# first --reference-rows rows, where it also checks that both give the same columns.
+#
+# To run: python benchmark_case_linking.py [--rows 1000000] [--reference-rows 5000]
+#
+#
+###############################################################################################################
+
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from case_linking import (
+    CRM_ID_COLUMN,
+    CREATED_COLUMN,
+    LINK_MARKER,
+    NOTE_COLUMN,
+    URL_COLUMN,
+    add_case_link_columns,
+    case_link_summary
+)
+
+
+def synthetic_query3(rows, notes_per_case=5, linked_share=0.2, seed=1):
+    rng = np.random.default_rng(seed)
+    case_ids = rng.integers(0, max(1, rows // notes_per_case), rows)
+    linked = rng.random(rows) < linked_share
+    articles = rng.integers(0, 5000, rows)
+    notes = np.where(
+        linked,
+        pd.Series(articles).map(lambda a: f"See https://tylertech.cxoneexpert.ai/Enterprise/Article_{a}").to_numpy(),
+        "Called customer back and walked through the roll correction steps."
+    )
+    crm_ids = pd.Series(case_ids).map(lambda c: f"CAS-{c:07d}")
+    return pd.DataFrame({
+        CRM_ID_COLUMN: crm_ids,
+        NOTE_COLUMN: notes,
+        CREATED_COLUMN: pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s"),
+        URL_COLUMN: crm_ids.map(lambda c: f"<a href='https://crm.example.com/case/{c}'>{c}</a>")
+    })
+
+
+# The calculated columns one row at a time, as Power BI evaluates them
+def row_by_row(query3):
+    records = query3.to_dict("records")
+    result = []
+    for row in records:
+        note = row[NOTE_COLUMN] or ""
+        is_linked = int(LINK_MARKER in note.lower())
+        same_case = [other for other in records if other[CRM_ID_COLUMN] == row[CRM_ID_COLUMN]]
+        case_is_linked = max(int(LINK_MARKER in (other[NOTE_COLUMN] or "").lower()) for other in same_case)
+        rank = 1 + sum(other[CREATED_COLUMN] < row[CREATED_COLUMN] for other in same_case)
+        url = row[URL_COLUMN]
+        result.append({
+            "Is_Linked": is_linked,
+            "Article_Title": note[note.rfind("/") + 1:] if is_linked else "None",
+            "Case_Is_Linked": case_is_linked,
+            "CRM_URL": url[9:url.find("'", 9)],
+            "Display_Flag": int(is_linked == 1 or (case_is_linked == 0 and rank == 1))
+        })
+    return pd.DataFrame(result, index=query3.index)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the vectorized Query3 case-linking columns.")
+    arg_parser.add_argument("--rows", type=int, default=1000000, help="note rows in the synthetic extract")
+    arg_parser.add_argument("--reference-rows", type=int, default=5000,
+                            help="rows for the row-by-row comparison, 0 to skip it")
+    args = arg_parser.parse_args()
+
+    query3, seconds = timed(synthetic_query3, args.rows)
+    print(f"Generated {len(query3)} rows, {query3[CRM_ID_COLUMN].nunique()} cases in {seconds:.1f}s")
+
+    frame, seconds = timed(add_case_link_columns, query3)
+    summary, summary_seconds = timed(case_link_summary, frame)
+    print(f"Vectorized columns: {seconds:.2f}s ({len(frame) / seconds:,.0f} rows/s); "
+          f"measures: {summary_seconds:.2f}s")
+    print(summary)
+
+    if args.reference_rows:
+        sample = query3.head(args.reference_rows)
+        reference, reference_seconds = timed(row_by_row, sample)
+        vectorized, vectorized_seconds = timed(add_case_link_columns, sample)
+        columns = list(reference.columns)
+        same = reference.astype(str).equals(vectorized[columns].astype(str))
+        print(f"{len(sample)} rows: row by row {reference_seconds:.2f}s, vectorized {vectorized_seconds:.3f}s "
+              f"({reference_seconds / vectorized_seconds:,.0f}x); same result: {same}")
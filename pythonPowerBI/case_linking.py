@@ -0,0 +1,145 @@
+###############################################################################################################
+#
+#
+# Precomputes the Query3 case-linking columns that DAX/PowerBI_Stuff defines as calculated columns, so the
+# Power BI model loads a finished table instead of evaluating them row by row on every refresh.
+#
+# Per note row (same names as the DAX / SQL):
+#   Is_Linked        1 if the work note links a CXone Expert article ("tylertech.cxoneexpert")
+#   Article_Title    text after the note's last "/" for linked notes, else "None"
+#   Case_Is_Linked   1 if any note on the same CRM_ID is linked
+#   CRM_URL          tyl_urlforemailtemplate from character 10 up to the next "'"
+#   Display_Flag     1 for linked notes, and for the first note (by Created_On) of a case with no linked notes
+# Per extract (the DAX measures, for the unfiltered table):
+#   Linked_Cases                distinct CRM_IDs with a note containing "tylertech.cxoneexpert.ai"
+#   Percentage of Cases Linked  distinct linked CRM_IDs / distinct CRM_IDs
+#
+# Everything is computed with whole-column string operations and one groupby per CRM_ID, where the DAX
+# Display Flag re-filters Query3 for every row (RANKX over FILTER(Query3, crm_id = CurrentCRM)).
+#
+# Input and output can be .csv or .parquet (Parquet needs pyarrow). The measures are written next to the
+# output as <output>.summary.json.
+#
+# To run: python case_linking.py query3.csv query3_linked.parquet
+#
+#
+###############################################################################################################
+
+
+import argparse
+import json
+import os
+
+import pandas as pd
+
+LINK_MARKER = "tylertech.cxoneexpert"
+# The DAX Linked_Cases measure matches the longer host name
+LINKED_CASES_MARKER = "tylertech.cxoneexpert.ai"
+
+CRM_ID_COLUMN = "CRM_ID"
+NOTE_COLUMN = "Work_Note"
+CREATED_COLUMN = "Created_On"
+URL_COLUMN = "tyl_urlforemailtemplate"
+
+
+def read_table(path):
+    if path.lower().endswith(".parquet"):
+        return pd.read_parquet(path)
+    frame = pd.read_csv(path, encoding="utf-8-sig", low_memory=False)
+    # Display_Flag orders by Created_On, which must compare as a date rather than as text
+    if CREATED_COLUMN in frame:
+        frame[CREATED_COLUMN] = pd.to_datetime(frame[CREATED_COLUMN], errors="coerce")
+    return frame
+
+
+def write_table(frame, path):
+    if path.lower().endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False, encoding="utf-8")
+
+
+# Case-insensitive like the DAX CONTAINSSTRING and the SQL LIKE; blank notes count as not linked
+def contains(notes, marker):
+    return notes.fillna("").str.lower().str.contains(marker, regex=False)
+
+
+# Applies a string transform once per distinct value instead of once per row: URLs repeat on every note of a
+# case and linked notes often share an article. Missing values stay missing.
+def map_distinct(values, transform):
+    codes, uniques = pd.factorize(values)
+    mapped = transform(pd.Series(uniques, dtype="string")).to_numpy(dtype=object)
+    result = pd.Series(pd.NA, index=values.index, dtype="string")
+    present = codes >= 0
+    result[present] = mapped[codes[present]]
+    return result
+
+
+# Adds Is_Linked, Article_Title, Case_Is_Linked, CRM_URL and Display_Flag to a copy of the Query3 extract.
+# order_column picks each case's "first" note for Display_Flag (ties keep extract order); with None the
+# extract order is used, like the DAX Index column.
+def add_case_link_columns(query3, order_column=CREATED_COLUMN):
+    frame = query3.copy()
+    notes = frame[NOTE_COLUMN].fillna("")
+
+    is_linked = contains(notes, LINK_MARKER)
+    frame["Is_Linked"] = is_linked.astype("int8")
+
+    # Text after the last "/", i.e. the article slug of the linked URL
+    article_title = pd.Series("None", index=frame.index, dtype="string")
+    article_title[is_linked] = map_distinct(notes[is_linked], lambda linked: linked.str.rsplit("/", n=1).str[-1])
+    frame["Article_Title"] = article_title
+
+    # Notes with a blank CRM_ID form one case of their own, as BLANK() does in the DAX
+    case_is_linked = frame.groupby(CRM_ID_COLUMN, sort=False, dropna=False)["Is_Linked"].transform("max")
+    frame["Case_Is_Linked"] = case_is_linked.astype("int8")
+
+    # MID(url, 10, FIND("'", url, 10) - 10); blank where the URL has no closing quote, as DAX would error
+    if URL_COLUMN in frame:
+        frame["CRM_URL"] = map_distinct(frame[URL_COLUMN],
+                                        lambda urls: urls.str.extract(r"^.{9}([^']*)'", expand=False))
+
+    if order_column and order_column in frame:
+        ordered = frame[[CRM_ID_COLUMN, order_column]].sort_values(order_column, kind="stable")
+        first_note = ordered.groupby(CRM_ID_COLUMN, sort=False, dropna=False).cumcount().eq(0).reindex(frame.index)
+    else:
+        first_note = frame.groupby(CRM_ID_COLUMN, sort=False, dropna=False).cumcount().eq(0)
+    frame["Display_Flag"] = (is_linked | (case_is_linked.eq(0) & first_note)).astype("int8")
+    return frame
+
+
+# The DAX measures over the whole table: {"Linked_Cases", "Total_Cases", "Percentage of Cases Linked"}
+# DISTINCTCOUNT counts a blank CRM_ID as one more value, so nunique keeps it too
+def case_link_summary(frame):
+    total_cases = frame[CRM_ID_COLUMN].nunique(dropna=False)
+    linked_cases = frame.loc[contains(frame[NOTE_COLUMN], LINKED_CASES_MARKER), CRM_ID_COLUMN].nunique(dropna=False)
+    cases_linked = frame.loc[frame["Case_Is_Linked"].eq(1), CRM_ID_COLUMN].nunique(dropna=False)
+    return {
+        "Linked_Cases": int(linked_cases),
+        "Total_Cases": int(total_cases),
+        # DIVIDE returns blank on a zero denominator
+        "Percentage of Cases Linked": cases_linked / total_cases if total_cases else None
+    }
+
+
+def compute_case_links(input_path, output_path, order_column=CREATED_COLUMN):
+    frame = add_case_link_columns(read_table(input_path), order_column)
+    write_table(frame, output_path)
+    summary = case_link_summary(frame)
+    with open(f"{output_path}.summary.json", mode='w', encoding='utf-8') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return frame, summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Precompute the Query3 case-linking columns for Power BI.")
+    arg_parser.add_argument("input", help="Query3 extract (.csv or .parquet)")
+    arg_parser.add_argument("output", help="table to write (.csv or .parquet)")
+    arg_parser.add_argument("--order-column", default=CREATED_COLUMN,
+                            help="column that orders a case's notes for Display_Flag ('' for extract order)")
+    args = arg_parser.parse_args()
+
+    result, measures = compute_case_links(args.input, args.output, args.order_column or None)
+    print(f"Wrote {len(result)} rows to {os.path.abspath(args.output)}")
+    for name, value in measures.items():
+        print(f"{name}: {value}")